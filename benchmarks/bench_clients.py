@@ -0,0 +1,59 @@
+"""
+Benchmark: storage client construction overhead
+-----------------------------------------------
+Measures the per-call cost of building a fresh storage client / gcsfs
+filesystem (what upload_to_gcs, log_run and log_metadata used to do) against
+fetching the shared one from clients.get_client.
+
+Anonymous clients are used by default so the benchmark runs without
+credentials; pass --authenticated to include credential discovery, which is
+the dominant cost in Composer.
+
+Usage:
+    python benchmarks/bench_clients.py --calls 200
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import gcsfs
+from google.cloud import storage
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "orchestration", "plugins"))
+import clients  # noqa: E402
+
+
+def per_call_ms(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--bucket", default="us-central1-storypoints-ai--aa8817f2-bucket")
+    parser.add_argument("--authenticated", action="store_true")
+    args = parser.parse_args()
+
+    if args.authenticated:
+        make_storage, make_fs = storage.Client, lambda: gcsfs.GCSFileSystem(skip_instance_cache=True)
+    else:
+        make_storage = storage.Client.create_anonymous_client
+        make_fs = lambda: gcsfs.GCSFileSystem(token="anon", skip_instance_cache=True)  # noqa: E731
+
+    cases = [
+        ("storage.Client + bucket (new)", lambda: make_storage().bucket(args.bucket)),
+        ("storage.Client + bucket (shared)", lambda: clients.get_client("bench-storage", make_storage).bucket(args.bucket)),
+        ("GCSFileSystem (new)", make_fs),
+        ("GCSFileSystem (shared)", lambda: clients.get_client("bench-gcsfs", make_fs)),
+    ]
+    for label, fn in cases:
+        print(f"{label:<36} {per_call_ms(fn, args.calls):10.4f} ms/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: amount_in_usd conversion
+-----------------------------------
+Compares the original row-wise ``df.apply(to_usd, axis=1)`` path with the
+vectorized ``convert_to_usd`` used by ``process_transactions``.
+
+Usage:
+    python benchmarks/bench_currency_conversion.py --sizes 100000 1000000 10000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "orchestration", "plugins"))
+from etl_pipeline import convert_to_usd  # noqa: E402
+
+RATES = {"USD": 1.0, "EUR": 0.853, "GBP": 0.738, "INR": 88.2, "JPY": 147.5, "ZAR": 0.0}
+CURRENCIES = np.array(["usd", "EUR", "gbp", "INR", "JPY", "XXX", "zar"])
+
+
+def make_transactions(n: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "amount": rng.uniform(1, 500, n).round(2),
+        "currency": CURRENCIES[rng.integers(0, len(CURRENCIES), n)],
+    })
+
+
+def legacy_convert(df: pd.DataFrame, rates: dict) -> tuple:
+    def to_usd(row):
+        cur = str(row["currency"]).upper()
+        amt = row["amount"]
+        rate = rates.get(cur)
+        if rate and rate != 0:
+            return amt / rate
+        return pd.NA
+    out = df.apply(to_usd, axis=1)
+    missing = sorted(c for c in df["currency"].str.upper().unique() if c not in rates)
+    return out, missing
+
+
+def timed(fn, *args) -> tuple:
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--skip-legacy-above", type=int, default=None,
+                        help="Skip the row-wise path for sizes above this (it is very slow at 10M)")
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'legacy_s':>10} {'vector_s':>10} {'speedup':>9} {'match':>6}")
+    for n in args.sizes:
+        df = make_transactions(n)
+        t_new, (new, new_missing) = timed(convert_to_usd, df["amount"], df["currency"], RATES)
+
+        if args.skip_legacy_above is not None and n > args.skip_legacy_above:
+            print(f"{n:>12,} {'-':>10} {t_new:>10.3f} {'-':>9} {'-':>6}")
+            continue
+
+        t_old, (old, old_missing) = timed(legacy_convert, df, RATES)
+        old_values = pd.to_numeric(old, errors="coerce").to_numpy(dtype="float64")
+        new_values = new.to_numpy(dtype="float64", na_value=np.nan)
+        match = np.allclose(old_values, new_values, equal_nan=True) and old_missing == new_missing
+        print(f"{n:>12,} {t_old:>10.3f} {t_new:>10.3f} {t_old / t_new:>8.1f}x {str(match):>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: processed output formats
+-----------------------------------
+Writes synthetic cleaned clickstream and transactions chunks through
+``writers.open_writer`` as CSV and as Parquet (snappy / zstd) and reports
+write time, file size and read-back time for each.
+
+Usage:
+    python benchmarks/bench_output_formats.py --rows 1000000 --chunk-size 50000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "orchestration", "plugins"))
+from writers import open_writer  # noqa: E402
+
+PAGES = np.array([f"/product/{i}" for i in range(200)] + ["/", "/cart", "/checkout", "/search"])
+CURRENCIES = np.array(["USD", "EUR", "GBP", "INR", "JPY"])
+VARIANTS = [("csv", None), ("parquet", "snappy"), ("parquet", "zstd")]
+
+
+def make_clickstream(n: int, rng) -> pd.DataFrame:
+    start = pd.Timestamp("2025-09-01", tz="UTC")
+    return pd.DataFrame({
+        "user_id": rng.integers(1, 50_000, n),
+        "session_id": rng.integers(1, 500_000, n),
+        "page_url": PAGES[rng.integers(0, len(PAGES), n)],
+        "click_time": start + pd.to_timedelta(rng.integers(0, 86_400 * 30, n), unit="s"),
+    })
+
+
+def make_transactions(n: int, rng) -> pd.DataFrame:
+    start = pd.Timestamp("2025-09-01", tz="UTC")
+    amount = rng.uniform(1, 500, n).round(2)
+    return pd.DataFrame({
+        "txn_id": "t_" + pd.Series(np.arange(n)).astype(str),
+        "user_id": rng.integers(1, 50_000, n),
+        "amount": amount,
+        "currency": CURRENCIES[rng.integers(0, len(CURRENCIES), n)],
+        "txn_time": start + pd.to_timedelta(rng.integers(0, 86_400 * 30, n), unit="s"),
+        "amount_in_usd": amount * 1.1,
+    })
+
+
+def bench(df: pd.DataFrame, dictionary_columns: list, chunk_size: int, workdir: str) -> None:
+    for fmt, codec in VARIANTS:
+        label = fmt if codec is None else f"{fmt}/{codec}"
+        path = os.path.join(workdir, f"out.{fmt}")
+
+        start = time.perf_counter()
+        with open_writer(path, fmt, dictionary_columns, codec or "zstd") as writer:
+            for i in range(0, len(df), chunk_size):
+                writer.write(df.iloc[i:i + chunk_size])
+        write_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if fmt == "csv":
+            pd.read_csv(path)
+        else:
+            pd.read_parquet(path)
+        read_s = time.perf_counter() - start
+
+        size_mb = os.path.getsize(path) / 1e6
+        print(f"  {label:<16} write {write_s:7.2f}s  read {read_s:7.2f}s  size {size_mb:9.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"clickstream ({args.rows:,} rows)")
+        bench(make_clickstream(args.rows, rng), ["page_url"], args.chunk_size, workdir)
+        print(f"transactions ({args.rows:,} rows)")
+        bench(make_transactions(args.rows, rng), ["currency"], args.chunk_size, workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark: parallel per-chunk transforms
+----------------------------------------
+Writes synthetic raw clickstream and transactions CSVs, then streams them
+through ``parallel_chunks.map_chunks`` with the pipeline's chunk transforms
+for each worker count and reports rows/sec.
+
+Usage:
+    python benchmarks/bench_parallel_chunks.py --rows 2000000 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "orchestration", "plugins"))
+from etl_pipeline import transform_clickstream_chunk, transform_transactions_chunk  # noqa: E402
+from parallel_chunks import map_chunks  # noqa: E402
+
+RATES = {"USD": 1.0, "EUR": 0.853, "GBP": 0.738, "INR": 88.2, "JPY": 147.5}
+
+
+def write_raw_csvs(n: int, workdir: str) -> dict:
+    rng = np.random.default_rng(42)
+    times = pd.Timestamp("2025-09-01") + pd.to_timedelta(rng.integers(0, 86_400 * 30, n), unit="s")
+    clicks = pd.DataFrame({
+        "user_id": rng.integers(1, 50_000, n),
+        "session_id": "s_" + pd.Series(rng.integers(1, 500_000, n)).astype(str),
+        "page_url": np.array(["/", "/cart", "/checkout", "/search"])[rng.integers(0, 4, n)],
+        "click_time": times.strftime("%Y-%m-%d %H:%M:%S"),
+        "device": np.array(["mobile", "desktop", "tablet"])[rng.integers(0, 3, n)],
+        "location": np.array(["US", "IN", "GB", "DE"])[rng.integers(0, 4, n)],
+    })
+    txns = pd.DataFrame({
+        "txn_id": "t_" + pd.Series(np.arange(n)).astype(str),
+        "user_id": rng.integers(1, 50_000, n),
+        "amount": rng.uniform(1, 500, n).round(2),
+        "currency": np.array(list(RATES))[rng.integers(0, len(RATES), n)],
+        "txn_time": times.strftime("%Y-%m-%d %H:%M:%S"),
+    })
+    paths = {"clickstream": os.path.join(workdir, "clickstream.csv"),
+             "transactions": os.path.join(workdir, "transactions.csv")}
+    clicks.to_csv(paths["clickstream"], index=False)
+    txns.to_csv(paths["transactions"], index=False)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    transforms = {
+        "clickstream": transform_clickstream_chunk,
+        "transactions": partial(transform_transactions_chunk, rates=RATES),
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        paths = write_raw_csvs(args.rows, workdir)
+        print(f"{'dataset':<14} {'workers':>7} {'seconds':>9} {'rows/s':>14}")
+        for dataset, fn in transforms.items():
+            for workers in sorted(set(args.workers)):
+                start = time.perf_counter()
+                rows = 0
+                for out in map_chunks(pd.read_csv(paths[dataset], chunksize=args.chunk_size), fn, workers):
+                    rows += len(out[0] if isinstance(out, tuple) else out)
+                elapsed = time.perf_counter() - start
+                print(f"{dataset:<14} {workers:>7} {elapsed:>9.2f} {rows / elapsed:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Benchmark: pipeline stages on synthetic data
+--------------------------------------------
+Generates deterministic raw inputs with ``synthetic_data.py`` (cached in
+--data-dir) and streams them chunk by chunk through the pipeline's own
+functions, timing every stage separately:
+
+    read                 read_chunks (pd.read_csv, schema-typed unless --no-schema)
+    standardize_columns  standardize_columns
+    parse_timestamps     detect_timestamp_format (first chunk) + parse_timestamps
+    dedup                StreamingDeduplicator.drop_duplicates
+    enrich               convert_to_usd                      (transactions)
+    validate             RuleValidator.split, the rules behind validate_transactions (transactions)
+    write                open_writer(...).write to a local file (CSV or Parquet)
+
+The local filesystem stands in for GCS; nothing is uploaded. Results are
+printed as a table and written as JSON (--output), and --compare prints the
+per-stage speedup against an earlier results file.
+
+Usage:
+    python benchmarks/bench_pipeline_stages.py --rows 1000000 10000000 50000000 --output results.json
+    python benchmarks/bench_pipeline_stages.py --rows 1000000 --compare results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "orchestration", "plugins"))
+sys.path.insert(0, os.path.dirname(__file__))
+import etl_pipeline  # noqa: E402
+from dedup import StreamingDeduplicator  # noqa: E402
+from schemas import SCHEMAS  # noqa: E402
+from synthetic_data import write_dataset  # noqa: E402
+from timestamps import detect_timestamp_format, parse_timestamps  # noqa: E402
+from validation import RuleValidator  # noqa: E402
+from writers import FILE_EXTENSIONS, open_writer  # noqa: E402
+
+RATES = {"USD": 1.0, "EUR": 0.853, "GBP": 0.738, "INR": 88.2, "JPY": 147.5}
+TIME_COLUMNS = {"clickstream": "click_time", "transactions": "txn_time"}
+
+
+class StageTimer:
+    """Accumulates wall-clock seconds and input rows per stage name."""
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.rows = defaultdict(int)
+
+    @contextmanager
+    def __call__(self, stage: str, rows: int = 0):
+        start = time.perf_counter()
+        yield
+        self.seconds[stage] += time.perf_counter() - start
+        self.rows[stage] += rows
+
+
+def run_dataset(dataset: str, path: str, out_dir: str, output_format: str, use_schema: bool) -> StageTimer:
+    schema = SCHEMAS[dataset]
+    column = TIME_COLUMNS[dataset]
+    timer = StageTimer()
+    dedup = StreamingDeduplicator()
+    validator = RuleValidator()
+    time_format = None
+    out_path = os.path.join(out_dir, f"{dataset}.{FILE_EXTENSIONS[output_format]}")
+
+    with open(path, "rb") as src, open_writer(out_path, output_format, schema.dictionary_columns) as writer:
+        reader = etl_pipeline.read_chunks(src, schema if use_schema else None)
+        while True:
+            with timer("read"):
+                chunk = next(reader, None)
+            if chunk is None:
+                break
+            n = len(chunk)
+            timer.rows["read"] += n
+
+            with timer("standardize_columns", n):
+                chunk = etl_pipeline.standardize_columns(chunk)
+            with timer("parse_timestamps", n):
+                if time_format is None:
+                    time_format = detect_timestamp_format(chunk[column], (path, column))
+                chunk[column], _ = parse_timestamps(chunk[column], time_format)
+            with timer("dedup", n):
+                chunk = dedup.drop_duplicates(chunk)
+
+            if dataset == "transactions":
+                with timer("enrich", len(chunk)):
+                    chunk["amount_in_usd"], _ = etl_pipeline.convert_to_usd(chunk["amount"], chunk["currency"], RATES)
+                with timer("validate", len(chunk)):
+                    chunk, _ = validator.split(chunk)
+
+            with timer("write", len(chunk)):
+                writer.write(chunk)
+        with timer("write"):
+            writer.close()
+    return timer
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata(args) -> dict:
+    try:
+        import pyarrow
+        pyarrow_version = pyarrow.__version__
+    except ImportError:
+        pyarrow_version = None
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "pyarrow": pyarrow_version,
+        "cpu_count": os.cpu_count(),
+        "chunk_size": args.chunk_size,
+        "use_schema": not args.no_schema,
+        "output_format": args.output_format,
+        "seed": args.seed,
+    }
+
+
+def print_comparison(results: list, baseline_path: str) -> None:
+    with open(baseline_path) as f:
+        baseline = {(r["dataset"], r["rows"], r["stage"]): r for r in json.load(f)["results"]}
+    print(f"\nvs {baseline_path}")
+    print(f"{'dataset':>12} {'rows':>12} {'stage':>20} {'before_s':>9} {'after_s':>9} {'speedup':>8}")
+    for r in results:
+        old = baseline.get((r["dataset"], r["rows"], r["stage"]))
+        if old and r["seconds"] > 0:
+            print(f"{r['dataset']:>12} {r['rows']:>12,} {r['stage']:>20} {old['seconds']:>9.3f} "
+                  f"{r['seconds']:>9.3f} {old['seconds'] / r['seconds']:>7.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000])
+    parser.add_argument("--datasets", nargs="+", default=["clickstream", "transactions"])
+    parser.add_argument("--chunk-size", type=int, default=etl_pipeline.CHUNK_SIZE)
+    parser.add_argument("--output-format", choices=["csv", "parquet"], default="parquet")
+    parser.add_argument("--no-schema", action="store_true", help="Infer dtypes instead of using schemas.py")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "etl-bench-data"),
+                        help="Cache for generated inputs")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--compare", help="Earlier --output file to compare against")
+    args = parser.parse_args()
+
+    etl_pipeline.CHUNK_SIZE = args.chunk_size
+    results = []
+    print(f"{'dataset':>12} {'rows':>12} {'stage':>20} {'seconds':>9} {'rows/s':>14}")
+    for rows in args.rows:
+        for dataset in args.datasets:
+            path = write_dataset(dataset, rows, args.data_dir, args.seed)
+            with tempfile.TemporaryDirectory() as out_dir:
+                timer = run_dataset(dataset, path, out_dir, args.output_format, not args.no_schema)
+
+            stages = dict(timer.seconds)
+            stages["total"] = sum(stages.values())
+            for stage, seconds in stages.items():
+                stage_rows = timer.rows.get(stage, rows)
+                rate = stage_rows / seconds if seconds > 0 else None
+                results.append({"dataset": dataset, "rows": rows, "stage": stage, "seconds": round(seconds, 4),
+                                "rows_in": stage_rows, "rows_per_s": round(rate) if rate else None})
+                print(f"{dataset:>12} {rows:>12,} {stage:>20} {seconds:>9.3f} {rate or 0:>14,.0f}")
+
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"peak RSS: {peak_rss_mb:,.0f} MB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"meta": {**run_metadata(args), "peak_rss_mb": round(peak_rss_mb, 1)}, "results": results},
+                      f, indent=2)
+        print(f"Results → {args.output}")
+    if args.compare:
+        print_comparison(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark: exchange-rate fetching
+---------------------------------
+Fetches bases × dates payloads from the local stub API (stub_rates_api.py)
+serially, one blocking ``requests.get`` at a time like ``fetch_exchange_rates``,
+then with the asyncio ``rate_fetcher.fetch_rates`` at several concurrency
+levels. The token bucket and retry path are exercised with --rate-limit and
+--fail-rate.
+
+Usage:
+    python benchmarks/bench_rate_fetcher.py --bases USD EUR GBP --days 10 --latency 0.1
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "orchestration", "plugins"))
+sys.path.insert(0, os.path.dirname(__file__))
+from rate_fetcher import fetch_rates, rate_url  # noqa: E402
+from stub_rates_api import StubRatesServer  # noqa: E402
+
+
+def serial_fetch(bases, dates, base_url: str) -> int:
+    fetched = 0
+    for day in dates:
+        for base in bases:
+            resp = requests.get(rate_url(base_url, "bench-key", base, day), timeout=20)
+            fetched += resp.json().get("result") == "success"
+    return fetched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bases", nargs="+", default=["USD", "EUR", "GBP"])
+    parser.add_argument("--days", type=int, default=10, help="Historical dates ending yesterday")
+    parser.add_argument("--latency", type=float, default=0.1, help="Stub server delay per response (s)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of stub responses that are HTTP 503")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--rate-limit", type=float, default=1000.0, help="Token-bucket requests per second")
+    args = parser.parse_args()
+
+    end = date.today() - timedelta(days=1)
+    dates = [(end - timedelta(days=i)).isoformat() for i in range(args.days)]
+    n = len(dates) * len(args.bases)
+
+    with StubRatesServer(latency=args.latency, fail_rate=args.fail_rate) as server, \
+            tempfile.TemporaryDirectory() as raw_dir:
+        print(f"{n} requests, {args.latency * 1000:.0f} ms latency, {args.fail_rate:.0%} failures")
+        print(f"{'mode':>16} {'seconds':>9} {'req/s':>8} {'peak_in_flight':>15}")
+
+        if args.fail_rate == 0:
+            start = time.perf_counter()
+            serial_fetch(args.bases, dates, server.base_url)
+            elapsed = time.perf_counter() - start
+            print(f"{'serial':>16} {elapsed:>9.2f} {n / elapsed:>8.1f} {1:>15}")
+
+        for concurrency in args.concurrency:
+            server.max_in_flight = 0
+            start = time.perf_counter()
+            fetch_rates(args.bases, dates, "bench-key", server.base_url, raw_dir,
+                        concurrency=concurrency, rate_limit=args.rate_limit, backoff=0.05)
+            elapsed = time.perf_counter() - start
+            print(f"{f'async x{concurrency}':>16} {elapsed:>9.2f} {n / elapsed:>8.1f} {server.max_in_flight:>15}")
+
+
+if __name__ == "__main__":
+    main()
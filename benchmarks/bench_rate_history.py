@@ -0,0 +1,57 @@
+"""
+Benchmark: point-in-time (as-of) currency conversion
+----------------------------------------------------
+Builds a RateHistory from the archived rates under data/raw/api_currency and
+measures RateHistory.convert throughput against the single-snapshot
+convert_to_usd path.
+
+Usage:
+    python benchmarks/bench_rate_history.py --sizes 1000000 10000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(ROOT, "orchestration", "plugins"))
+from etl_pipeline import convert_to_usd  # noqa: E402
+from rate_history import load_rate_history  # noqa: E402
+
+CURRENCIES = np.array(["usd", "EUR", "gbp", "INR", "JPY", "XXX"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--raw-dir", default=os.path.join(ROOT, "data", "raw", "api_currency"))
+    args = parser.parse_args()
+
+    history = load_rate_history(args.raw_dir)
+    latest = dict(zip(history.currencies, history.matrix[-1, :-1]))
+    first, last = history.updated_at[0], history.updated_at[-1]
+    rng = np.random.default_rng(42)
+
+    print(f"{'rows':>12} {'as_of_s':>9} {'rows/s':>14} {'latest_s':>9} {'rows/s':>14}")
+    for n in args.sizes:
+        amount = pd.Series(rng.uniform(1, 500, n).round(2))
+        currency = pd.Series(CURRENCIES[rng.integers(0, len(CURRENCIES), n)])
+        txn_time = pd.Series(pd.to_datetime(rng.integers(first - 86_400, last + 86_400, n), unit="s", utc=True))
+
+        start = time.perf_counter()
+        history.convert(amount, currency, txn_time)
+        t_asof = time.perf_counter() - start
+
+        start = time.perf_counter()
+        convert_to_usd(amount, currency, latest)
+        t_latest = time.perf_counter() - start
+
+        print(f"{n:>12,} {t_asof:>9.3f} {n / t_asof:>14,.0f} {t_latest:>9.3f} {n / t_latest:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark: transaction validation
+---------------------------------
+Compares the original multi-pass ``validate_transactions`` (``df.isna().any()``
+plus boolean-filtered copies for amounts and currencies, dataset-level
+verdict) with the single-pass bitmask ``RuleValidator.split`` that also
+separates quarantined rows and counts failures per rule.
+
+Usage:
+    python benchmarks/bench_validation.py --sizes 1000000 10000000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "orchestration", "plugins"))
+from validation import VALID_CURRENCIES, RuleValidator  # noqa: E402
+
+CURRENCIES = np.array(["USD", "EUR", "GBP", "INR", "JPY", "usd", "XXX"])
+
+
+def make_transactions(n: int, bad_rate: float = 0.01, seed: int = 42) -> pd.DataFrame:
+    """Typed frame shaped like schemas.TRANSACTIONS_SCHEMA with ~bad_rate nulls and non-positive amounts."""
+    rng = np.random.default_rng(seed)
+    amount = rng.uniform(1, 500, n).round(2)
+    amount[rng.random(n) < bad_rate] = 0.0
+    amount[rng.random(n) < bad_rate] = np.nan
+    user_id = pd.array(rng.integers(1, 100_000, n), dtype="Int64")
+    user_id[rng.random(n) < bad_rate] = pd.NA
+    return pd.DataFrame({
+        "txn_id": pd.array("t_" + pd.Series(np.arange(n)).astype(str), dtype="string"),
+        "user_id": user_id,
+        "amount": amount,
+        "currency": pd.Categorical(CURRENCIES[rng.integers(0, len(CURRENCIES), n)]),
+        "txn_time": pd.Timestamp("2025-01-01", tz="UTC") + pd.to_timedelta(rng.integers(0, 86_400, n), unit="s"),
+    })
+
+
+def legacy_validate(df: pd.DataFrame) -> pd.DataFrame:
+    issues = []
+    null_cols = df.columns[df.isna().any()].tolist()
+    if null_cols:
+        issues.append(f"Null values in columns: {null_cols}")
+    neg = df[df["amount"] <= 0]
+    if not neg.empty:
+        issues.append(f"Negative or zero amounts: {len(neg)} rows")
+    invalid_cur = df[~df["currency"].str.upper().isin(VALID_CURRENCIES)]
+    if not invalid_cur.empty:
+        issues.append(f"Invalid currencies: {invalid_cur['currency'].unique().tolist()}")
+    df["validation_status"] = "failed" if issues else "passed"
+    return df
+
+
+def timed(fn, *args) -> tuple:
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--bad-rate", type=float, default=0.01, help="Share of rows broken per rule")
+    parser.add_argument("--object-currency", action="store_true",
+                        help="Use plain string currencies, as read with USE_SCHEMAS = False")
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'legacy_s':>10} {'rules_s':>10} {'speedup':>9} {'valid':>12} {'quarantined':>12}")
+    for n in args.sizes:
+        df = make_transactions(n, args.bad_rate)
+        if args.object_currency:
+            df["currency"] = df["currency"].astype(object)
+        t_old, _ = timed(legacy_validate, df.copy())
+
+        validator = RuleValidator()
+        t_new, (valid, quarantined) = timed(validator.split, df)
+        print(f"{n:>12,} {t_old:>10.3f} {t_new:>10.3f} {t_old / t_new:>8.1f}x "
+              f"{len(valid):>12,} {len(quarantined):>12,}")
+        print(f"{'':>12} per-rule failures: {validator.summary()['failures']}")
+
+
+if __name__ == "__main__":
+    main()
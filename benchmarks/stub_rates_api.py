@@ -0,0 +1,148 @@
+"""
+Stub ExchangeRate API
+---------------------
+Local HTTP server imitating the v6 ExchangeRate API endpoints used by the
+pipeline, for exercising ``rate_fetcher`` without network access or quota:
+
+    /v6/<key>/latest/<BASE>
+    /v6/<key>/history/<BASE>/<YYYY>/<M>/<D>
+
+Responses are the real payload shape with rates rebased from a fixed USD
+table. ``latency`` delays every response and ``fail_rate`` answers a share of
+requests with HTTP 503 (retryable), so retries and backoff can be observed.
+
+Usage (standalone):
+    python benchmarks/stub_rates_api.py --port 8765 --latency 0.1
+
+Usage (in a script):
+    with StubRatesServer(latency=0.05) as server:
+        fetch_rates(["USD", "EUR"], None, "test-key", server.base_url, "/tmp/raw")
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+USD_RATES = {"USD": 1.0, "EUR": 0.853, "GBP": 0.738, "INR": 88.2, "JPY": 147.5, "AUD": 1.51, "CAD": 1.38}
+
+
+def make_payload(base: str, day: datetime = None) -> dict:
+    rebased = {code: round(rate / USD_RATES[base], 6) for code, rate in USD_RATES.items()}
+    if day is not None:
+        return {"result": "success", "year": day.year, "month": day.month, "day": day.day,
+                "base_code": base, "conversion_rates": rebased}
+    now = int(time.time())
+    return {"result": "success", "time_last_update_unix": now - now % 86_400,
+            "time_next_update_unix": now - now % 86_400 + 86_400, "base_code": base,
+            "conversion_rates": rebased}
+
+
+class StubRatesServer:
+    """
+    Threaded stub server on localhost; use as a context manager.
+
+    Args:
+        port (int): Port to bind (0 picks a free one)
+        latency (float): Seconds to wait before every response
+        fail_rate (float): Share of requests answered with HTTP 503
+    """
+
+    def __init__(self, port: int = 0, latency: float = 0.0, fail_rate: float = 0.0):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/v6"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: dict) -> None:
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                try:
+                    time.sleep(server.latency)
+                    self._respond()
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+            def _respond(self):
+                if random.random() < server.fail_rate:
+                    return self._send(503, {"result": "error", "error-type": "service-unavailable"})
+
+                parts = self.path.strip("/").split("/")  # v6, key, endpoint, base, ...
+                if len(parts) < 4 or parts[2] not in ("latest", "history"):
+                    return self._send(404, {"result": "error", "error-type": "unknown-endpoint"})
+                base = parts[3].upper()
+                if base not in USD_RATES:
+                    return self._send(400, {"result": "error", "error-type": "unsupported-code"})
+                if parts[2] == "latest":
+                    return self._send(200, make_payload(base))
+                try:
+                    day = datetime(*(int(p) for p in parts[4:7]), tzinfo=timezone.utc)
+                except (TypeError, ValueError):
+                    return self._send(400, {"result": "error", "error-type": "malformed-request"})
+                return self._send(200, make_payload(base, day))
+
+        return Handler
+
+    def start(self) -> "StubRatesServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = StubRatesServer(args.port, args.latency, args.fail_rate)
+    print(f"Serving stub ExchangeRate API at {server.base_url} (Ctrl+C to stop)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Synthetic raw inputs
+--------------------
+Deterministic generator for raw clickstream.csv / transactions.csv files
+shaped like the real inputs: their snake_case headers and string ids
+(``session_id`` like "s_000123", ``txn_id`` like "t_00004567"), the extra
+``device`` / ``location`` columns ``schemas.py`` declares, plus the dirt the
+pipeline has to handle:
+
+- exact duplicate rows (``dup_rate``),
+- bad currencies: unknown codes, lower-case/padded codes and blanks,
+- malformed timestamps: unparseable strings, impossible dates and blanks,
+- zero and negative amounts.
+
+Rows are written in blocks of ``block_rows`` with one seeded generator per
+block, so the same (rows, seed) always produces byte-identical files, and
+50M-row files are generated without holding them in memory. Generated files
+are cached by (dataset, rows, seed, FORMAT) in the target directory.
+
+Usage:
+    python benchmarks/synthetic_data.py --rows 10000000 --out /tmp/etl-bench
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+CURRENCIES = np.array(["USD", "EUR", "GBP", "INR", "JPY"])
+BAD_CURRENCIES = np.array(["XXX", "usd", " eur", ""])
+PAGES = np.array(["/", "/home", "/search", "/product", "/cart", "/checkout", "/account", "/help"])
+DEVICES = np.array(["mobile", "desktop", "tablet"])
+LOCATIONS = np.array(["US", "IN", "GB", "DE", "FR", "JP", "BR", "CA"])
+BAD_TIMESTAMPS = np.array(["not-a-date", "2025-13-45 25:61:00", ""])
+START = pd.Timestamp("2025-09-01")
+BLOCK_ROWS = 1_000_000
+# Bump when the generated layout changes so stale cached files are not reused
+FORMAT = 2
+
+
+def _times(rng, n: int, bad_rate: float) -> np.ndarray:
+    times = (START + pd.to_timedelta(rng.integers(0, 86_400 * 30, n), unit="s")).strftime("%Y-%m-%d %H:%M:%S")
+    times = np.asarray(times, dtype=object)
+    bad = rng.random(n) < bad_rate
+    times[bad] = BAD_TIMESTAMPS[rng.integers(0, len(BAD_TIMESTAMPS), bad.sum())]
+    return times
+
+
+def _ids(prefix: str, numbers: np.ndarray, width: int) -> np.ndarray:
+    return (prefix + pd.Series(numbers).astype(str).str.zfill(width)).to_numpy(dtype=object)
+
+
+def _with_duplicates(rng, df: pd.DataFrame, dup_rate: float) -> pd.DataFrame:
+    """Overwrite a dup_rate share of rows with copies of earlier rows in the block."""
+    n = len(df)
+    dup = np.flatnonzero(rng.random(n) < dup_rate)
+    dup = dup[dup > 0]
+    if dup.size:
+        src = (rng.random(dup.size) * dup).astype(np.int64)  # some row before each duplicate
+        for column in df.columns:
+            values = df[column].to_numpy(copy=True)
+            values[dup] = values[src]
+            df[column] = values
+    return df
+
+
+def clickstream_block(n: int, seed: int, offset: int = 0, dup_rate: float = 0.02,
+                      bad_rate: float = 0.005) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "user_id": rng.integers(1, 1_000_000, n),
+        "session_id": _ids("s_", (offset + np.arange(n)) // 8, 6),
+        "page_url": PAGES[rng.integers(0, len(PAGES), n)],
+        "click_time": _times(rng, n, bad_rate),
+        "device": DEVICES[rng.integers(0, len(DEVICES), n)],
+        "location": LOCATIONS[rng.integers(0, len(LOCATIONS), n)],
+    })
+    return _with_duplicates(rng, df, dup_rate)
+
+
+def transactions_block(n: int, seed: int, offset: int = 0, dup_rate: float = 0.02,
+                       bad_rate: float = 0.005) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    currency = CURRENCIES[rng.integers(0, len(CURRENCIES), n)].astype(object)
+    bad = rng.random(n) < bad_rate
+    currency[bad] = BAD_CURRENCIES[rng.integers(0, len(BAD_CURRENCIES), bad.sum())]
+    amount = rng.uniform(1, 500, n).round(2)
+    amount[rng.random(n) < bad_rate] = -rng.uniform(0, 50)
+
+    df = pd.DataFrame({
+        "txn_id": _ids("t_", offset + np.arange(n), 8),
+        "user_id": rng.integers(1, 1_000_000, n),
+        "amount": amount,
+        "currency": currency,
+        "txn_time": _times(rng, n, bad_rate),
+    })
+    return _with_duplicates(rng, df, dup_rate)
+
+
+BLOCKS = {"clickstream": clickstream_block, "transactions": transactions_block}
+
+
+def write_dataset(dataset: str, rows: int, out_dir: str, seed: int = 42, block_rows: int = BLOCK_ROWS,
+                  **kwargs) -> str:
+    """
+    Write (or reuse) a synthetic raw CSV and return its path.
+
+    Args:
+        dataset (str): 'clickstream' or 'transactions'
+        rows (int): Rows to generate
+        out_dir (str): Directory for the cached file
+        seed (int): Base seed; block i uses seed + i
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{dataset}_{rows}_{seed}_v{FORMAT}.csv")
+    if os.path.isfile(path):
+        return path
+
+    tmp = path + ".tmp"
+    with open(tmp, "w", newline="") as f:
+        for i, offset in enumerate(range(0, rows, block_rows)):
+            block = BLOCKS[dataset](min(block_rows, rows - offset), seed + i, offset, **kwargs)
+            block.to_csv(f, header=i == 0, index=False)
+    os.replace(tmp, path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000])
+    parser.add_argument("--out", default=os.path.join("benchmarks", "data"))
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        for dataset in BLOCKS:
+            path = write_dataset(dataset, rows, args.out, args.seed)
+            print(f"{dataset:>12} {rows:>12,} rows → {path} ({os.path.getsize(path) / 1e6:,.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,14 @@
 ETL Week 2 DAG - StoryPoints AI
 Orchestrates:
 1. Fetch currency API
-2. Ingest clickstream
-3. Ingest + validate transactions
+2. Ingest clickstream (+ per-session aggregates)
+3. Ingest + validate transactions (+ last-click attribution)
 4. Load to GCS (only if validation passes)
 5. Log metadata & alerts
 """
 
 import os
+import logging
 from datetime import datetime, timedelta
 
 from airflow import DAG
@@ -17,8 +18,10 @@ from airflow.utils.trigger_rule import TriggerRule
 
 # Import Week 1 ETL functions
 
-from etl_pipeline import process_clickstream, process_transactions, fetch_exchange_rates
-from validation import validate_transactions
+from etl_pipeline import process_clickstream, process_transactions, fetch_exchange_rates, INGEST_DATE, compact_stores
+from etl_pipeline import SHARDS, plan_input_shards, process_shard, process_sessions
+from etl_pipeline import process_attribution
+from manifests import rates_snapshot_uri, save_rates_snapshot, load_rates, rates_manifest, dataset_manifest
 from log_utils import log_metadata, log_alert
 
 # Config
@@ -45,31 +48,88 @@ default_args = {
 
 import pandas as pd
 
-# Wrapper function for validation + metadata logging
-def validate_and_process_transactions():
+# Tasks exchange small manifests (see manifests.py) via XCom, never DataFrames
+
+# Fetch rates once and publish a reference to the snapshot downstream tasks convert with
+def publish_exchange_rates():
     rates = fetch_exchange_rates()
-    df = process_transactions(rates)
+    uri = save_rates_snapshot(rates, rates_snapshot_uri(BUCKET_NAME, INGEST_DATE))
+    return rates_manifest(uri, rates, INGEST_DATE)
 
-    if df is None:
-        logging.warning("process_transactions returned None, skipping validation.")
-        log_metadata("transactions", 0, 0, "FAIL", BUCKET_NAME)
-        return None
+# With SHARDS > 1 each dataset fans out: plan_<dataset>_shards → <dataset>_shard (one mapped task
+# instance per byte range, each writing a Parquet part) → process_<dataset>, which merges the parts
+
+# Shard list for dynamic task mapping (one op_kwargs dict per shard)
+def plan_dataset_shards(dataset, ti):
+    rates = load_rates(ti.xcom_pull(task_ids="fetch_currency_api")) if dataset == "transactions" else None
+    return [{"dataset": dataset, "shard": shard} for shard in plan_input_shards(dataset, SHARDS, rates=rates)]
 
-    # Run validation
-    df_validated = validate_transactions(df)
+# Mapped task: transform one shard into a staged part; returns the part's reference + metrics
+def run_shard(dataset, shard, ti):
+    rates = load_rates(ti.xcom_pull(task_ids="fetch_currency_api")) if dataset == "transactions" else None
+    return process_shard(dataset, shard, rates)
 
-    rows_in = len(df)
-    rows_out = len(df_validated)
-    status = "PASS" if rows_out == rows_in else "FAIL"
+# Parts produced by a dataset's mapped shard tasks, or None when not sharding
+def shard_parts(ti, dataset):
+    if SHARDS <= 1:
+        return None
+    return [part for part in ti.xcom_pull(task_ids=f"{dataset}_shard") or [] if part]
+
+# Wrapper function for clickstream processing
+def publish_clickstream(ti):
+    summary = process_clickstream(parts=shard_parts(ti, "clickstream"))
+    return dataset_manifest("clickstream", summary, BUCKET_NAME, INGEST_DATE)
+
+# Sessionize the clickstream output named in process_clickstream's manifest
+def publish_sessions(ti):
+    clickstream = ti.xcom_pull(task_ids="process_clickstream")
+    if not clickstream or clickstream["status"] != "success":
+        logging.info("No new clickstream output; sessions left as they are.")
+        return dataset_manifest("sessions", {"status": "skipped"}, BUCKET_NAME, INGEST_DATE)
+    summary = process_sessions(clickstream["output"])
+    return dataset_manifest("sessions", summary, BUCKET_NAME, INGEST_DATE)
 
-    # Log metadata
-    log_metadata("transactions", rows_in, rows_out, status, BUCKET_NAME)
+# Wrapper function for validation + metadata logging
+def validate_and_process_transactions(ti):
+    rates = load_rates(ti.xcom_pull(task_ids="fetch_currency_api"))
 
-    # Fail DAG if validation failed
-    if status == "FAIL":
-        raise ValueError("Validation failed for transactions dataset")
+    # Rows failing validation.TRANSACTION_RULES are quarantined inside process_transactions, which also
+    # grades the run (PASS/QUARANTINED) in its run-log record and raises on a FAIL (more than
+    # MAX_QUARANTINE_RATE of the validated rows quarantined) before committing anything
+    summary = process_transactions(rates, validate=True, parts=shard_parts(ti, "transactions"))
+    manifest = dataset_manifest("transactions", summary, BUCKET_NAME, INGEST_DATE)
 
-    return df_validated
+    if summary is None:
+        logging.warning("process_transactions returned None, skipping validation.")
+        log_metadata("transactions", 0, 0, "FAIL", BUCKET_NAME)
+        return manifest
+
+    if summary["rule_failures"]:
+        logging.warning(f"Transactions rule failures: {summary['rule_failures']} "
+                        f"({summary['quarantined']} of {summary['rows_validated']} validated rows quarantined)")
+    return manifest
+
+# Join the clickstream and transactions outputs named in their manifests
+def publish_attribution(ti):
+    clickstream, transactions = ti.xcom_pull(task_ids=["process_clickstream", "process_transactions"])
+    if not all(m and m["status"] == "success" for m in (clickstream, transactions)):
+        logging.info("Clickstream or transactions wrote no new output; attribution left as it is.")
+        return dataset_manifest("attributed_transactions", {"status": "skipped"}, BUCKET_NAME, INGEST_DATE)
+    summary = process_attribution(clickstream["output"], transactions["output"])
+    return dataset_manifest("attributed_transactions", summary, BUCKET_NAME, INGEST_DATE)
+
+# Summarize what the run produced from the upstream manifests
+def finalize_pipeline(ti):
+    for manifest in ti.xcom_pull(task_ids=["process_clickstream", "build_sessions", "process_transactions",
+                                           "attribute_transactions"]):
+        if manifest:
+            logging.info(
+                f"{manifest['dataset']}: {manifest['status']} rows_out={manifest['rows_out']} "
+                f"output={manifest['output']} quarantine={manifest['quarantine']}"
+            )
+    # The only place a DAG run compacts shared stores, so compactions never overlap within a run
+    compact_stores()
+    print("ETL pipeline completed successfully!")
 
 # Define DAG
 with DAG(
@@ -84,28 +144,60 @@ with DAG(
     # Task 1: Fetch currency API
     fetch_currency_task = PythonOperator(
         task_id="fetch_currency_api",
-        python_callable=fetch_exchange_rates,
+        python_callable=publish_exchange_rates,
     )
 
-    # Task 2: Process clickstream
+    # Task 2: Process clickstream (merges shard parts when sharded)
     process_clickstream_task = PythonOperator(
         task_id="process_clickstream",
-        python_callable=process_clickstream,
+        python_callable=publish_clickstream,
+        trigger_rule=TriggerRule.NONE_FAILED,  # an empty shard map is skipped, not failed
     )
 
-    # Task 3: Process + validate transactions
+    # Task 2b: Per-session aggregates from the cleaned clickstream
+    build_sessions_task = PythonOperator(
+        task_id="build_sessions",
+        python_callable=publish_sessions,
+    )
+
+    # Task 3: Process + validate transactions (merges shard parts when sharded)
     process_transactions_task = PythonOperator(
         task_id="process_transactions",
         python_callable=validate_and_process_transactions,
+        trigger_rule=TriggerRule.NONE_FAILED,
+    )
+
+    # Task 3b: Credit each transaction to the user's last earlier click
+    attribution_task = PythonOperator(
+        task_id="attribute_transactions",
+        python_callable=publish_attribution,
     )
 
     # Task 4: Final load marker (runs only if all pass)
     finalize_task = PythonOperator(
         task_id="finalize_pipeline",
-        python_callable=lambda: print("ETL pipeline completed successfully!"),
+        python_callable=finalize_pipeline,
         trigger_rule=TriggerRule.ALL_SUCCESS,
     )
 
     # Dependencies
     fetch_currency_task >> [process_clickstream_task, process_transactions_task]
-    [process_clickstream_task, process_transactions_task] >> finalize_task
+    process_clickstream_task >> build_sessions_task
+    [process_clickstream_task, process_transactions_task] >> attribution_task
+
+    # Optional fan-out: map shard tasks over each input's planned byte ranges
+    if SHARDS > 1:
+        for dataset, merge_task in (("clickstream", process_clickstream_task),
+                                    ("transactions", process_transactions_task)):
+            plan_task = PythonOperator(
+                task_id=f"plan_{dataset}_shards",
+                python_callable=plan_dataset_shards,
+                op_kwargs={"dataset": dataset},
+            )
+            shard_task = PythonOperator.partial(
+                task_id=f"{dataset}_shard",
+                python_callable=run_shard,
+            ).expand(op_kwargs=plan_task.output)
+            fetch_currency_task >> plan_task
+            shard_task >> merge_task
+    [build_sessions_task, attribution_task] >> finalize_task
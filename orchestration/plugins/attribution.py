@@ -0,0 +1,136 @@
+"""
+attribution.py
+--------------
+Last-click attribution of transactions to the cleaned clickstream.
+
+Each transaction is matched to the same user's latest click at or before
+its txn_time (optionally no older than a lookback window) with one sorted
+`pd.merge_asof(..., by="user_id")` per partition, instead of scanning each
+user's clicks per transaction.
+
+To scale past memory both inputs are first scattered, chunk by chunk, into
+per-partition Parquet spool files by a hash of user_id. A user's clicks and
+transactions always land in the same partition, so partitions are
+attributed one at a time and only one partition is ever in memory.
+
+Attribution columns added to each transaction (NA when no click matches):
+
+    attributed_session_id, attributed_page_url, attributed_click_time, seconds_since_click
+
+Functions:
+    user_partitions(user_id, partitions)
+    attribute(transactions, clicks, lookback, session_dtype)
+
+Classes:
+    PartitionSpool(directory, name, partitions, dictionary_columns)
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from writers import open_writer
+
+ATTRIBUTION_COLUMNS = ["attributed_session_id", "attributed_page_url", "attributed_click_time",
+                       "seconds_since_click"]
+
+
+def user_partitions(user_id: pd.Series, partitions: int) -> np.ndarray:
+    """Partition index of every row, from a hash of user_id (missing ids share one partition)."""
+    ids = pd.Series(user_id).to_numpy(dtype=np.int64, na_value=-1)
+    return (pd.util.hash_array(ids) % np.uint64(partitions)).astype(np.intp)
+
+
+class PartitionSpool:
+    """
+    Scatter chunks into one Parquet file per user-id hash partition.
+
+    Args:
+        directory (str): Local directory for the spool files
+        name (str): File name prefix, e.g. 'clicks'
+        partitions (int): Number of hash partitions
+        dictionary_columns (list, optional): Columns to dictionary-encode
+    """
+
+    def __init__(self, directory: str, name: str, partitions: int, dictionary_columns=None):
+        self.partitions = partitions
+        self.dictionary_columns = dictionary_columns
+        self.paths = [os.path.join(directory, f"{name}-{i:04d}.parquet") for i in range(partitions)]
+        self._writers = [None] * partitions
+        self.rows = 0
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        parts = user_partitions(chunk["user_id"], self.partitions)
+        order = np.argsort(parts, kind="stable")
+        bounds = np.cumsum(np.bincount(parts, minlength=self.partitions))[:-1]
+        for i, rows in enumerate(np.split(order, bounds)):
+            if len(rows):
+                if self._writers[i] is None:
+                    self._writers[i] = open_writer(self.paths[i], "parquet", self.dictionary_columns, "snappy")
+                self._writers[i].write(chunk.iloc[rows])
+        self.rows += len(chunk)
+
+    def close(self) -> None:
+        for writer in self._writers:
+            if writer is not None:
+                writer.close()
+
+    def read(self, partition: int) -> pd.DataFrame:
+        """Rows of one partition, or None if no chunk had any (call after close)."""
+        if self._writers[partition] is None:
+            return None
+        return pd.read_parquet(self.paths[partition])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attribute(transactions: pd.DataFrame, clicks: pd.DataFrame = None, lookback: pd.Timedelta = None,
+              session_dtype=None) -> pd.DataFrame:
+    """
+    Attribute each transaction to the user's last click at or before txn_time.
+
+    Args:
+        transactions (pd.DataFrame): Rows with user_id and a UTC datetime txn_time
+        clicks (pd.DataFrame, optional): Rows with user_id, session_id, page_url and a UTC datetime click_time
+        lookback (pd.Timedelta, optional): Ignore clicks older than this before the transaction
+        session_dtype (optional): dtype of attributed_session_id; defaults to the clicks' session_id dtype
+            (pass it explicitly so partitions without clicks write the same type)
+
+    Returns:
+        pd.DataFrame: transactions (same rows and order) plus ATTRIBUTION_COLUMNS
+    """
+    out = transactions.reset_index(drop=True)
+    if session_dtype is None:
+        session_dtype = clicks["session_id"].dtype if clicks is not None else "string"
+    matched = pd.DataFrame(index=pd.RangeIndex(0), columns=ATTRIBUTION_COLUMNS[:3])
+
+    if clicks is not None and len(clicks):
+        keyed = (out["user_id"].notna() & out["txn_time"].notna()).to_numpy()
+        left = pd.DataFrame({
+            "user_id": out["user_id"].to_numpy(dtype=np.int64, na_value=-1)[keyed],
+            "txn_time": out["txn_time"].to_numpy()[keyed],
+            "_row": np.flatnonzero(keyed),
+        }).sort_values("txn_time", kind="stable")
+
+        clicks = clicks.dropna(subset=["user_id", "click_time"])
+        right = pd.DataFrame({
+            "user_id": clicks["user_id"].to_numpy(dtype=np.int64),
+            "attributed_session_id": clicks["session_id"].array,
+            "attributed_page_url": clicks["page_url"].array,
+            "attributed_click_time": clicks["click_time"].array,
+        }).sort_values("attributed_click_time", kind="stable")
+
+        matched = pd.merge_asof(left, right, left_on="txn_time", right_on="attributed_click_time", by="user_id",
+                                direction="backward", tolerance=lookback).set_index("_row")
+
+    attributed = matched.reindex(pd.RangeIndex(len(out)))
+    out["attributed_session_id"] = attributed["attributed_session_id"].astype(session_dtype)
+    out["attributed_page_url"] = attributed["attributed_page_url"].astype("category")
+    out["attributed_click_time"] = pd.to_datetime(attributed["attributed_click_time"], utc=True)
+    out["seconds_since_click"] = (out["txn_time"] - out["attributed_click_time"]).dt.total_seconds()
+    return out
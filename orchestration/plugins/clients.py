@@ -0,0 +1,89 @@
+"""
+clients.py
+----------
+Process-wide registry of shared storage clients.
+
+Building a google.cloud.storage.Client or gcsfs.GCSFileSystem redoes
+credential discovery and opens new HTTP sessions, so the pipeline asks this
+module for them instead of constructing one per call. Clients are created
+lazily under a lock and dropped in forked children (an HTTP session must not
+be shared across processes), so process pools get their own.
+
+Functions:
+    get_client(name, factory)
+    get_storage_client()
+    get_gcsfs()
+    get_fs(url)
+    reset_clients()
+"""
+
+import os
+import threading
+
+import fsspec
+import gcsfs
+import requests
+from google.cloud import storage
+
+# Max pooled HTTP connections per storage.Client (requests' default is 10)
+HTTP_POOL_SIZE = int(os.environ.get("GCS_HTTP_POOL_SIZE", "32"))
+
+_clients = {}
+_lock = threading.Lock()
+_pid = os.getpid()
+
+
+def reset_clients() -> None:
+    """Forget all cached clients (called automatically in forked children)."""
+    global _lock, _pid
+    _clients.clear()
+    _lock = threading.Lock()  # the parent's lock may have been held while forking
+    _pid = os.getpid()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_clients)
+
+
+def get_client(name: str, factory):
+    """
+    Return the shared client registered under name, building it once with factory().
+
+    Args:
+        name (str): Registry key
+        factory (callable): Zero-argument constructor used on first access
+    """
+    if os.getpid() != _pid:  # fork without register_at_fork support
+        reset_clients()
+
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = factory()
+    return client
+
+
+def _make_storage_client() -> storage.Client:
+    client = storage.Client()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    client._http.mount("https://", adapter)
+    return client
+
+
+def get_storage_client() -> storage.Client:
+    """Shared google.cloud.storage.Client with a HTTP_POOL_SIZE connection pool."""
+    return get_client("storage", _make_storage_client)
+
+
+def get_gcsfs() -> gcsfs.GCSFileSystem:
+    """Shared gcsfs filesystem (Composer's service account via token='cloud' resolution)."""
+    return get_client("gcsfs", gcsfs.GCSFileSystem)
+
+
+def get_fs(url: str):
+    """Filesystem for a URL or path: the shared gcsfs for gs://, a fresh fsspec filesystem otherwise."""
+    if url.startswith("gs://"):
+        return get_gcsfs()
+    return fsspec.core.url_to_fs(url, auto_mkdir=True)[0]
@@ -0,0 +1,5 @@
+# The plugins are imported as flat modules (as Airflow and the benchmarks do), so put this directory on sys.path
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -0,0 +1,71 @@
+"""
+dedup.py
+--------
+Streaming, cross-chunk deduplication for the chunked ETL readers.
+
+Each row (or a configured key subset of columns) is reduced to a 64-bit hash
+with pandas' hash_pandas_object. Hashes seen so far are kept as a few sorted
+uint64 NumPy runs (8 bytes per row, merged like a binary counter), so the
+full dataset never has to be concatenated before drop_duplicates.
+
+Classes:
+    StreamingDeduplicator(key=None)
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class StreamingDeduplicator:
+    """
+    Drop rows already seen earlier in the stream, keeping the first occurrence.
+
+    Args:
+        key (list, optional): columns that identify a row; None uses every column
+    """
+
+    def __init__(self, key=None):
+        self.key = list(key) if key else None
+        self._runs = []  # sorted, disjoint uint64 arrays; sizes shrink towards the end
+        self.rows_in = 0
+        self.rows_out = 0
+
+    def __len__(self) -> int:
+        return sum(run.size for run in self._runs)
+
+    @property
+    def deduped(self) -> int:
+        return self.rows_in - self.rows_out
+
+    def hash_rows(self, df: pd.DataFrame) -> np.ndarray:
+        cols = df[self.key] if self.key else df
+        return pd.util.hash_pandas_object(cols, index=False).to_numpy(dtype=np.uint64)
+
+    def _seen(self, hashes: np.ndarray) -> np.ndarray:
+        seen = np.zeros(hashes.size, dtype=bool)
+        for run in self._runs:
+            idx = np.searchsorted(run, hashes)
+            idx[idx == run.size] = 0
+            seen |= run[idx] == hashes
+        return seen
+
+    def _add(self, hashes: np.ndarray) -> None:
+        self._runs.append(np.sort(hashes))
+        while len(self._runs) > 1 and self._runs[-1].size * 2 >= self._runs[-2].size:
+            newest = self._runs.pop()
+            self._runs[-1] = np.union1d(self._runs[-1], newest)
+
+    def drop_duplicates(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Return the rows of df not seen before (in this chunk or earlier ones)."""
+        self.rows_in += len(df)
+        if df.empty:
+            return df
+
+        hashes = self.hash_rows(df)
+        dup = pd.Series(hashes).duplicated().to_numpy() | self._seen(hashes)
+        keep = ~dup
+        if keep.any():
+            self._add(hashes[keep])
+
+        self.rows_out += int(keep.sum())
+        return df[keep]
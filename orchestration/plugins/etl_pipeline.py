@@ -1,16 +1,40 @@
+import io
 import os
-import re
 import json
 import time
 import logging
-from datetime import datetime, date
+import argparse
+import tempfile
+import itertools
+from contextlib import ExitStack
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
 
 from dotenv import load_dotenv
-import gcsfs
 
+import numpy as np
 import pandas as pd
 import requests
-from google.cloud import storage
+
+from clients import get_gcsfs, get_storage_client
+from dedup import StreamingDeduplicator
+from writers import open_writer, FILE_EXTENSIONS
+from parallel_chunks import map_chunks
+from rate_cache import RateCache
+from rate_history import load_rate_history
+from rate_fetcher import fetch_rates
+from timestamps import detect_timestamp_format, parse_timestamps
+from watermarks import WatermarkFilter, EventDayFilter, watermark_root, load_watermark, save_watermark, reset_watermark
+from fingerprints import fingerprint_root, input_fingerprint, is_unchanged, save_fingerprint
+from validation import RuleValidator, TRANSACTION_RULES, VALID_CURRENCIES
+from sessions import CLICK_COLUMNS, sessionize
+from attribution import PartitionSpool, attribute
+from rollups import clickstream_rollup, transactions_rollup, rollup_root, save_rollup, compact_rollups
+from spans import SpanRecorder
+from shards import ByteRange, plan_shards, read_parts
+from schemas import CLICKSTREAM_SCHEMA, TRANSACTIONS_SCHEMA, read_header, snake_case
+from run_log import run_log_root, alerts_root, write_run_segment, maybe_compact_run_log
 
 # Setting Paths and constants
 CLICKSTREAM_PATH = "gs://us-central1-storypoints-ai--aa8817f2-bucket/dags/data_given/clickstream.csv"
@@ -24,13 +48,63 @@ API_KEY = "de1f36f23fe14f93642ba787"
 # API_KEY = os.getenv("API_KEY")
 # BUCKET_NAME = os.getenv("BUCKET_NAME")
 
-API_URL = f"https://v6.exchangerate-api.com/v6/{API_KEY}/latest/USD"
+API_BASE_URL = "https://v6.exchangerate-api.com/v6"
+API_URL = f"{API_BASE_URL}/{API_KEY}/latest/USD"
+# Multi-base / historical fetches (fetch_rate_payloads): requests in flight, requests per second
+RATE_BASES = ["USD"]
+FETCH_CONCURRENCY = 4
+FETCH_RATE_LIMIT = 5.0
 
 CHUNK_SIZE = 50_000
+# Read with the declared schemas in schemas.py (typed) instead of inferring every column
+USE_SCHEMAS = True
+# Worker processes for per-chunk transforms (1 = transform inline in the reader's process)
+TRANSFORM_WORKERS = 1
+# Columns identifying a duplicate row; None compares whole rows (e.g. ["user_id", "session_id", "click_time"])
+CLICKSTREAM_DEDUP_KEY = None
+TRANSACTIONS_DEDUP_KEY = None
+# Processed output: "csv" or "parquet" (typed, dictionary-encoded, compressed)
+OUTPUT_FORMAT = "csv"
+PARQUET_COMPRESSION = "zstd"
+# Serialize chunks straight into a resumable GCS upload instead of a local file + upload_to_gcs
+STREAM_UPLOAD = False
+UPLOAD_PART_SIZE = 8 * 1024 * 1024  # bytes per upload part (multiple of 256 KiB)
+KEEP_LOCAL_COPY = False  # with STREAM_UPLOAD, also write data/processed/...
+# Only ingest rows newer than the dataset's stored high-water mark (see watermarks.py)
+INCREMENTAL = False
+# Resume reading at the stored byte offset, so late appended rows are still ingested (append-only sources)
+WATERMARK_BYTE_OFFSET = True
+# Without an offset to resume from, still keep rows this much older than the watermark (None: none)
+WATERMARK_LATENESS = None  # e.g. pd.Timedelta(hours=1); older rows are dropped and counted as rows_filtered
+# Skip a dataset whose input fingerprint (generation/size/checksums) matches the last successful run
+SKIP_UNCHANGED = True
+# Check transactions against validation.TRANSACTION_RULES and divert failing rows to a quarantine partition
+VALIDATE_TRANSACTIONS = True
+# Fail the run when more than this share of the validated transactions is quarantined (None: never fail)
+MAX_QUARANTINE_RATE = 0.05
+# Byte-range shards per input for DAG fan-out (see shards.py); 1 keeps a single processing task
+SHARDS = int(os.environ.get("ETL_SHARDS", "1"))
+# Build processed/sessions/ per-session aggregates from the cleaned clickstream after each clickstream run
+SESSIONIZE = True
+SESSION_PARTITIONS = 16  # user-id hash partitions sessionized one at a time
+# Attribute transactions to the user's last earlier click (processed/attributed_transactions/)
+ATTRIBUTE_TRANSACTIONS = True
+ATTRIBUTION_LOOKBACK = None  # e.g. pd.Timedelta(hours=24); None credits any earlier click
+ATTRIBUTION_PARTITIONS = 16  # user-id hash partitions joined one at a time
+# Local directory for the sessions/attribution partition spool files (None: system temp dir)
+SPOOL_DIR = None
+# Maintain the daily rollup tables (rollups.py) from the chunk loops; each run adds a slice, merged on read
+ROLLUPS = True
+# Convert each transaction with the archived rate valid at its txn_time instead of today's rates
+AS_OF_CONVERSION = False
 LOCAL_PROCESSED_DIR = "data/processed"
+LOCAL_QUARANTINE_DIR = "data/quarantine"
 RAW_API_DIR = "data/raw/api_currency"
 INGEST_DATE = date.today().strftime("%Y-%m-%d")
 
+# Archived API payloads are reused until their time_next_update_unix
+RATE_CACHE = RateCache(RAW_API_DIR)
+
 # Set Logging
 logging.basicConfig(
     level=logging.INFO,
@@ -42,30 +116,36 @@ def ensure_dir(path: str) -> None:
     os.makedirs(path, exist_ok=True)
 
 # Run Log Helper 
-def log_run(dataset: str, rows_in: int, rows_out: int, validation_status: str = "success") -> None:
-    """Append run metadata to run_log.csv in GCS."""
-    fs = gcsfs.GCSFileSystem()
-    log_path = "gs://us-central1-storypoints-ai--aa8817f2-bucket/data/metadata/run_log.csv"
-
-    timestamp = datetime.utcnow().isoformat()
-    row = f"{dataset},{rows_in},{rows_out},{validation_status},{timestamp}\n"
-
-    # If log exists, append; otherwise, create with header
-    if fs.exists(log_path):
-        with fs.open(log_path, "ab") as f:  # append in binary
-            f.write(row.encode("utf-8"))
-    else:
-        header = "dataset,rows_in,rows_out,validation_status,timestamp\n"
-        with fs.open(log_path, "wb") as f:
-            f.write(header.encode("utf-8"))
-            f.write(row.encode("utf-8"))
-    logging.info(f"Logged run for {dataset} → run_log.csv")
+def log_run(dataset: str, rows_in: int, rows_out: int, validation_status: str = "success", **metrics) -> None:
+    """Record run metadata (plus optional metric columns) as a run-log segment in GCS (see run_log.py)."""
+    root = run_log_root(BUCKET_NAME)
+    write_run_segment(
+        {"dataset": dataset, "rows_in": rows_in, "rows_out": rows_out, "validation_status": validation_status,
+         **metrics},
+        root,
+    )
+    logging.info(f"Logged run for {dataset} → {root}")
 
 # Fetch USD-based conversion rates via API and save raw JSON (Task 2 + Task 5)
-def fetch_exchange_rates() -> dict:  
+def fetch_exchange_rates(use_cache: bool = True, ingest_date: str = None) -> dict:  
+    if ingest_date is not None and ingest_date != INGEST_DATE:
+        return fetch_historical_rates(ingest_date)
+
+    if use_cache:
+        cached = RATE_CACHE.get()
+        if cached is not None:
+            logging.info(
+                f"Using cached rates valid until {cached.get('time_next_update_utc')} "
+                f"(cache hits:{RATE_CACHE.hits} misses:{RATE_CACHE.misses})"
+            )
+            return cached["conversion_rates"]
+
+    spans = SpanRecorder()
     try:
-        resp = requests.get(API_URL, timeout=20)
-        data = resp.json()
+        with spans.span("fetch"):
+            resp = requests.get(API_URL, timeout=20)
+            data = resp.json()
+        spans.add("fetch", nbytes=len(resp.content))
     except Exception as e:
         logging.error(f"API request error: {e}")  # Task 5
         raise
@@ -75,142 +155,959 @@ def fetch_exchange_rates() -> dict:
         out_dir = os.path.join(RAW_API_DIR, INGEST_DATE)
         ensure_dir(out_dir)
         out_path = os.path.join(out_dir, "rates.json")
-        with open(out_path, "w") as f:
-            json.dump(data, f, indent=2)
+        with spans.span("archive"):
+            with open(out_path, "w") as f:
+                json.dump(data, f, indent=2)
         logging.info(f"Saved raw rates JSON → {out_path}")  # Task 5
+        RATE_CACHE.put(data)
+        if spans.enabled:
+            log_run("exchange_rates", 0, len(data["conversion_rates"]), "success", ingest_date=INGEST_DATE,
+                    **spans.columns())
         return data["conversion_rates"]
 
     logging.error(f"API failed: {data}")  # Task 5
     raise RuntimeError(f"ExchangeRate API failed: {data}")
 
+# Fetch several base currencies and/or historical dates concurrently, archiving each payload (Task 2 + Task 5)
+def fetch_rate_payloads(bases=None, dates=None, concurrency=FETCH_CONCURRENCY, rate_limit=FETCH_RATE_LIMIT,
+                        base_url: str = None, ingest_date: str = None) -> dict:
+    """
+    Args:
+        bases (list, optional): Base currencies (default RATE_BASES)
+        dates (list, optional): ISO dates for historical rates; None fetches the latest rates
+        base_url (str, optional): API root override, e.g. a local stub server
+        ingest_date (str, optional): Archive folder for latest rates (default INGEST_DATE)
+
+    Returns:
+        dict: {(base, date): raw payload}, archived under RAW_API_DIR/<date>/
+    """
+    return fetch_rates(bases or RATE_BASES, dates, API_KEY, base_url or API_BASE_URL, RAW_API_DIR,
+                       ingest_date=ingest_date or INGEST_DATE, concurrency=concurrency, rate_limit=rate_limit)
+
+# USD rates for a past ingest date: its archived payload, else the API's history endpoint (backfills)
+def fetch_historical_rates(day: str) -> dict:
+    path = os.path.join(RAW_API_DIR, day, "rates.json")
+    if os.path.isfile(path):
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("result") == "success":
+            logging.info(f"Using archived rates for {day} → {path}")
+            return data["conversion_rates"]
+    return fetch_rate_payloads(["USD"], [day])[("USD", day)]["conversion_rates"]
+
 # Standardize DataFrame column names to snake_case (Task 3)
 def standardize_columns(df: pd.DataFrame) -> pd.DataFrame:  
-    df.columns = [re.sub(r"__+", "_", re.sub(r"[^\w]+", "_", str(c).strip())).lower() for c in df.columns]  
+    df.columns = [snake_case(c) for c in df.columns]  
     return df
 
+# Convert amounts to USD in one vectorized pass (Task 3)
+def convert_to_usd(amount: pd.Series, currency: pd.Series, rates: dict) -> tuple:
+    """
+    Divide each amount by the USD rate of its (upper-cased) currency.
+
+    Currencies are mapped to positions in a per-category rate array, so the
+    dictionary lookup runs once per distinct code instead of once per row.
+    Unknown currencies and zero rates yield <NA>.
+
+    Returns:
+        tuple: (amount_in_usd as a Float64 Series, sorted list of currencies without a rate)
+    """
+    codes = pd.Categorical(currency.astype("string").str.upper())
+    categories = codes.categories.tolist()
+
+    lookup = np.array([rates.get(c) or np.nan for c in categories] + [np.nan], dtype="float64")
+    row_rates = lookup[codes.codes]  # code -1 (missing currency) hits the trailing NaN
+
+    values = np.divide(amount.to_numpy(dtype="float64", na_value=np.nan), row_rates)
+    amount_in_usd = pd.Series(pd.array(values, dtype="Float64"), index=amount.index)
+    amount_in_usd[np.isnan(row_rates)] = pd.NA
+
+    missing = sorted(c for c in categories if c not in rates)
+    return amount_in_usd, missing
+
 # Upload a local file to Google Cloud Storage (Task 4)
 def upload_to_gcs(local_file: str, gcs_path: str) -> None: 
-    client = storage.Client()
-    bucket = client.bucket(BUCKET_NAME)
+    bucket = get_storage_client().bucket(BUCKET_NAME)
     blob = bucket.blob(gcs_path)
     blob.upload_from_filename(local_file)
     logging.info(f"Uploaded {local_file} → gs://{BUCKET_NAME}/{gcs_path}")
 
+# Chunked reader over an open CSV; with a schema the declared columns are typed, and the
+# header is mapped to snake_case once per file instead of per chunk (Task 2)
+def read_chunks(src, schema=None, start_offset: int = 0, end_offset: int = None):
+    raw_columns = read_header(src)
+    options, mapping = {}, None
+    if schema is not None:
+        missing = schema.missing_columns(raw_columns)
+        if missing:
+            logging.warning(f"{schema.name}: declared columns missing from input header: {missing}")
+        undeclared = schema.undeclared_columns(raw_columns)
+        if undeclared:
+            logging.info(f"{schema.name}: undeclared columns kept with inferred dtypes: {undeclared}")
+        options, mapping = schema.read_options(raw_columns)
+
+    if start_offset:
+        # Resume mid-file (incremental runs): no header there, so reuse the one read above
+        src.seek(start_offset)
+        options.update(header=None, names=raw_columns)
+    if end_offset is not None:
+        # Byte-range shard: stop at end_offset (always a row boundary, see shards.plan_shards)
+        src = io.BufferedReader(ByteRange(src, end_offset - start_offset))
+
+    reader = pd.read_csv(src, chunksize=CHUNK_SIZE, **options)
+    if mapping is None:
+        return reader
+    return (chunk.rename(columns=mapping) for chunk in reader)
+
+# Detect a file's timestamp format once from its first chunk, then hand every chunk on unchanged
+def peek_timestamp_format(reader, column: str, cache_key=None) -> tuple:
+    first = next(reader, None)
+    if first is None:
+        return None, iter(())
+
+    names = list(standardize_columns(first.head(0)).columns)
+    fmt = detect_timestamp_format(first.iloc[:, names.index(column)], cache_key) if column in names else None
+    return fmt, itertools.chain([first], reader)
+
+# Per-chunk clickstream transform; top-level so process pools can pickle it (Task 3)
+def transform_clickstream_chunk(chunk: pd.DataFrame, time_format: str = None, standardize: bool = True) -> tuple:
+    """Returns (chunk, stats) where stats["nat"] counts click_time values coerced to NaT."""
+    if standardize:
+        chunk = standardize_columns(chunk)
+
+    nat = 0
+    if "click_time" in chunk.columns:
+        chunk["click_time"], nat = parse_timestamps(chunk["click_time"], time_format)
+    return chunk, {"nat": nat}
+
+# Per-chunk transactions transform (Task 3)
+def transform_transactions_chunk(chunk: pd.DataFrame, rates: dict, history=None, time_format: str = None,
+                                 standardize: bool = True) -> tuple:
+    """Returns (chunk, stats) with stats["missing"] (currencies without a rate) and stats["nat"]."""
+    if standardize:
+        chunk = standardize_columns(chunk)
+
+    nat = 0
+    if "txn_time" in chunk.columns:
+        chunk["txn_time"], nat = parse_timestamps(chunk["txn_time"], time_format)
+
+    missing = []
+    if {"amount", "currency"}.issubset(chunk.columns):
+        if history is not None and "txn_time" in chunk.columns:
+            chunk["amount_in_usd"], missing = history.convert(chunk["amount"], chunk["currency"], chunk["txn_time"])
+        else:
+            chunk["amount_in_usd"], missing = convert_to_usd(chunk["amount"], chunk["currency"], rates)
+    return chunk, {"missing": missing, "nat": nat}
+
+# Log chunk-transform throughput for the worker count used
+def log_throughput(dataset: str, rows: int, seconds: float, workers: int) -> None:
+    rate = rows / seconds if seconds > 0 else float("inf")
+    logging.info(f"{dataset} throughput: {rate:,.0f} rows/s with {max(workers, 1)} transform worker(s)")
+
+# Watermark an incremental run resumes from; None means process the whole input
+def start_watermark(dataset: str, source: str, incremental: bool, reset: bool) -> dict:
+    if not incremental:
+        return None
+    root = watermark_root(BUCKET_NAME)
+    if reset:
+        reset_watermark(dataset, root)
+        return None
+
+    watermark = load_watermark(dataset, root)
+    if watermark is not None and watermark.get("source") != source:
+        logging.warning(f"{dataset} watermark was recorded for {watermark.get('source')}; reprocessing {source}")
+        return None
+    return watermark
+
+# Byte offset to start reading at (only with WATERMARK_BYTE_OFFSET and a file that has not shrunk)
+def start_offset(watermark: dict, size: int) -> int:
+    if not WATERMARK_BYTE_OFFSET or watermark is None:
+        return 0
+    offset = watermark.get("byte_offset", 0)
+    return offset if offset <= size else 0
+
+# Settings a dataset's processed output depends on (module defaults, overridden by the run's arguments)
+def processing_config(dataset: str, rates: dict = None, **settings) -> dict:
+    config = {"schema": dataset_input(dataset)[1].columns, "output_format": OUTPUT_FORMAT,
+              "use_schema": USE_SCHEMAS, "parquet_compression": PARQUET_COMPRESSION}
+    if dataset == "clickstream":
+        config.update(dedup_key=CLICKSTREAM_DEDUP_KEY)
+    else:
+        config.update(dedup_key=TRANSACTIONS_DEDUP_KEY, as_of=AS_OF_CONVERSION, rates=rates,
+                      validate=VALIDATE_TRANSACTIONS, max_quarantine_rate=MAX_QUARANTINE_RATE,
+                      rules=[r.name for r in TRANSACTION_RULES], valid_currencies=VALID_CURRENCIES)
+    return {**config, **settings}
+
+# Fingerprint the input plus its processing config and decide whether this run can be skipped as unchanged
+def check_unchanged(dataset: str, fs, path: str, skip: bool, config: dict) -> tuple:
+    fingerprint = input_fingerprint(fs, path, config)
+    return fingerprint, skip and is_unchanged(dataset, path, fingerprint, fingerprint_root(BUCKET_NAME))
+
+# Local file and/or gs:// URL the chunk writer should target (Task 4)
+def output_targets(local_out: str, gcs_path: str, stream_upload: bool) -> list:
+    if not stream_upload:
+        return [local_out]
+    targets = [f"gs://{BUCKET_NAME}/{gcs_path}"]
+    if KEEP_LOCAL_COPY:
+        targets.append(local_out)
+    return targets
+
+# Input path, schema and event-time column of a dataset
+def dataset_input(dataset: str) -> tuple:
+    if dataset == "clickstream":
+        return CLICKSTREAM_PATH, CLICKSTREAM_SCHEMA, "click_time"
+    if dataset == "transactions":
+        return TRANSACTIONS_PATH, TRANSACTIONS_SCHEMA, "txn_time"
+    raise ValueError(f"Unknown dataset {dataset!r}")
+
+# Where a dataset's shard parts are staged until the merge commits them
+def shard_root(dataset: str, ingest_date: str = None) -> str:
+    return f"gs://{BUCKET_NAME}/processed/{dataset}/ingest_date={ingest_date or INGEST_DATE}/_shards"
+
+# Plan the shards a DAG maps over; none when the input is missing or unchanged
+# (`rates` are part of the transactions config, so pass the ones the merge will convert with)
+def plan_input_shards(dataset: str, shards: int = SHARDS, skip_unchanged=SKIP_UNCHANGED, force=False,
+                      rates: dict = None) -> list:
+    fs = get_gcsfs()
+    path = dataset_input(dataset)[0]
+    if not fs.exists(path):
+        logging.warning(f"Missing input: {path}")
+        return []
+    if check_unchanged(dataset, fs, path, skip_unchanged and not force, processing_config(dataset, rates))[1]:
+        return []
+
+    planned = plan_shards(fs, path, shards)
+    logging.info(f"{dataset} → {len(planned)} shard(s) of {path}")
+    return planned
+
+# Read + transform one shard into a typed Parquet part; dedup, validation and the final write happen in the merge
+def process_shard(dataset: str, shard: dict, rates: dict = None, as_of=AS_OF_CONVERSION,
+                  use_schema=USE_SCHEMAS, ingest_date: str = None) -> dict:
+    """
+    Args:
+        dataset (str): 'clickstream' or 'transactions'
+        shard (dict): One entry of plan_input_shards
+        rates (dict, optional): USD-based conversion rates (transactions only)
+        ingest_date (str, optional): Partition the shard belongs to (default INGEST_DATE)
+
+    Returns:
+        dict: the shard plus part (URI), rows, bytes, nat, missing and seconds, for process_*(parts=...)
+    """
+    fs = get_gcsfs()
+    path, schema, column = dataset_input(dataset)
+    part = f"{shard_root(dataset, ingest_date)}/part-{shard['index']:05d}.parquet"
+    if dataset == "transactions":
+        history = load_rate_history(RAW_API_DIR) if as_of else None
+        transform = partial(transform_transactions_chunk, rates=rates, history=history)
+    else:
+        transform = transform_clickstream_chunk
+
+    nat, missing = 0, set()
+    start = time.perf_counter()
+    with fs.open(shard["source"], "rb") as src, \
+            open_writer(part, "parquet", schema.dictionary_columns, PARQUET_COMPRESSION, UPLOAD_PART_SIZE,
+                        fs) as writer:
+        reader = read_chunks(src, schema if use_schema else None, shard["start"], shard["end"])
+        time_format, reader = peek_timestamp_format(reader, column, (shard["source"], column))
+        for chunk in reader:
+            chunk, stats = transform(chunk, time_format=time_format, standardize=not use_schema)
+            nat += stats["nat"]
+            missing.update(stats.get("missing", []))
+            writer.write(chunk)
+
+    seconds = time.perf_counter() - start
+    logging.info(f"{dataset} shard {shard['index']} → {writer.rows} rows in {seconds:.2f}s → {part}")
+    return {**shard, "part": part, "rows": writer.rows, "bytes": writer.bytes_written, "nat": nat,
+            "missing": sorted(missing), "seconds": round(seconds, 3)}
+
+# Run-log columns rolling up per-shard metrics of a merged run
+def shard_metrics(parts: list) -> dict:
+    if parts is None:
+        return {}
+    return {
+        "shards": len(parts),
+        "shard_max_seconds": max((p["seconds"] for p in parts), default=0.0),
+        "shard_metrics": json.dumps([{k: p[k] for k in ("index", "rows", "bytes", "seconds")} for p in parts]),
+    }
+
+# Bytes a run read: its slice of the raw input, or the staged parts when merging shards
+def input_bytes(parts: list, size: int, offset: int) -> int:
+    if parts is not None:
+        return sum(p["bytes"] for p in parts)
+    return size - offset
+
+# Drop the staged shard parts once the merged output is committed
+def remove_parts(parts: list, fs) -> None:
+    for part in parts or []:
+        if fs.exists(part["part"]):
+            fs.rm(part["part"])
+
 # ETL Functions
-def process_clickstream() -> None:
-    fs = gcsfs.GCSFileSystem()
+def process_clickstream(dedup_key=CLICKSTREAM_DEDUP_KEY, output_format=OUTPUT_FORMAT,
+                        stream_upload=STREAM_UPLOAD, workers=TRANSFORM_WORKERS, use_schema=USE_SCHEMAS,
+                        incremental=INCREMENTAL, reset=False, skip_unchanged=SKIP_UNCHANGED,
+                        force=False, parts=None, ingest_date: str = None, rollup=ROLLUPS,
+                        event_day: str = None) -> dict:
+    """
+    Args:
+        parts (list, optional): process_shard results to merge instead of reading CLICKSTREAM_PATH
+        ingest_date (str, optional): ISO date of the output partition (default INGEST_DATE, i.e. today)
+        rollup (bool): update the clicks_by_page_daily rollup from the written chunks
+        event_day (str, optional): keep only clicks on this ISO date (backfills); the input's
+            fingerprint is then not recorded, so the next daily run still processes it
+
+    Returns:
+        dict: summary {status, rows_in (read), filtered (watermark/event_day), rows_out, deduped,
+        timestamps_coerced, output, schema}, or None if the input is missing or empty
+    """
+    ingest_date = ingest_date or INGEST_DATE
+    fs = get_gcsfs()
 
     if not fs.exists(CLICKSTREAM_PATH):
         logging.warning(f"Missing input: {CLICKSTREAM_PATH}")
-        return
+        return None
+
+    config = processing_config("clickstream", output_format=output_format, use_schema=use_schema, dedup_key=dedup_key)
+    fingerprint, unchanged = check_unchanged(
+        "clickstream", fs, CLICKSTREAM_PATH, skip_unchanged and not (force or reset), config)
+    if unchanged:
+        logging.info("Clickstream → input unchanged since last successful run; skipping.")
+        log_run("clickstream", 0, 0, "skipped-unchanged", ingest_date=ingest_date)
+        return {"status": "skipped-unchanged", "rows_in": 0, "filtered": 0, "rows_out": 0, "deduped": 0,
+                "timestamps_coerced": 0, "output": None, "schema": None}
 
     ensure_dir(LOCAL_PROCESSED_DIR)
-    records_in, records_out = 0, 0
-    chunks = []
-
-    for chunk in pd.read_csv(
-        CLICKSTREAM_PATH,
-        storage_options={"token": "cloud"},   # tells pandas to authenticate via Composer's GCP service account
-        chunksize=CHUNK_SIZE
-    ):
-        records_in += len(chunk)
-        chunk = standardize_columns(chunk)
+    ext = FILE_EXTENSIONS[output_format]
+    local_out = os.path.join(LOCAL_PROCESSED_DIR, f"clickstream_clean_{ingest_date}.{ext}")
+    gcs_path = f"processed/clickstream/ingest_date={ingest_date}/clickstream.{ext}"
+    targets = output_targets(local_out, gcs_path, stream_upload)
 
-        if "click_time" in chunk.columns:
-            chunk["click_time"] = pd.to_datetime(chunk["click_time"], utc=True, errors="coerce")
+    # Deduplicate across chunks as they arrive and write survivors immediately
+    dedup = StreamingDeduplicator(dedup_key)
+    nat, rows_read = 0, 0
 
-        chunks.append(chunk)
+    # Incremental runs only keep rows past the stored high-water mark
+    watermark = start_watermark("clickstream", CLICKSTREAM_PATH, incremental, reset)
+    size = fs.size(CLICKSTREAM_PATH)
+    offset = start_offset(watermark, size)
+    newer = WatermarkFilter("click_time", watermark, WATERMARK_LATENESS, resumed=parts is None and offset > 0)
+    on_day = EventDayFilter("click_time", event_day)
 
-    if not chunks:
-        logging.warning("No clickstream chunks read.")
-        return
+    # Per-stage wall/CPU/RSS/bytes/rows, persisted as run-log columns (spans.py; ETL_SPANS=0 disables)
+    spans = SpanRecorder()
+    start = time.perf_counter()
 
-    # Combine chunks and deduplicate
-    df = pd.concat(chunks, ignore_index=True)
-    before = len(df)
-    df = df.drop_duplicates()
-    after = len(df)
-    deduped = before - after
+    # Daily clicks / distinct users per page, aggregated from each written chunk
+    rollup = clickstream_rollup() if rollup else None
 
-    # Save locally
-    local_out = os.path.join(LOCAL_PROCESSED_DIR, f"clickstream_clean_{INGEST_DATE}.csv")
-    df.to_csv(local_out, index=False)
+    # Read through the shared gcsfs client (Composer's GCP service account) instead of a new one per read;
+    # chunks are transformed by `workers` processes and come back in order for dedup + write
+    with ExitStack() as stack, \
+            open_writer(targets, output_format, CLICKSTREAM_SCHEMA.dictionary_columns,
+                        PARQUET_COMPRESSION, UPLOAD_PART_SIZE, fs) as writer:
+        if parts is None:
+            src = stack.enter_context(fs.open(CLICKSTREAM_PATH, "rb"))
+            reader = read_chunks(src, CLICKSTREAM_SCHEMA if use_schema else None, offset)
+            time_format, reader = peek_timestamp_format(reader, "click_time", (CLICKSTREAM_PATH, "click_time"))
+            transform = partial(transform_clickstream_chunk, time_format=time_format, standardize=not use_schema)
+            chunks = map_chunks(reader, transform, workers)
+        else:
+            # Merge: shards already parsed the rows; dedup and watermarking need the global order
+            chunks = read_parts(parts, CHUNK_SIZE, fs)
+
+        for chunk, stats in spans.timed_iter("read_transform", chunks):
+            spans.add("read_transform", rows=len(chunk))
+            rows_read += len(chunk)
+            nat += stats["nat"]
+            with spans.span("dedup", len(chunk)):
+                chunk = dedup.drop_duplicates(newer.apply(on_day.apply(chunk)))
+            with spans.span("write", len(chunk)):
+                writer.write(chunk)
+            if rollup is not None:
+                with spans.span("rollup", len(chunk)):
+                    rollup.update(chunk)
+
+    if writer.chunks == 0:
+        logging.warning("No clickstream chunks read.")
+        return None
+
+    # rows_in counts every row read; the watermark and event-day filters drop rows_filtered before dedup
+    records_in, filtered, after, deduped = rows_read, newer.skipped + on_day.skipped, dedup.rows_out, dedup.deduped
     logging.info(
-        f"Clickstream → in:{records_in} out:{after} deduped:{deduped} saved:{local_out}"
+        f"Clickstream → in:{records_in} filtered:{filtered} out:{after} deduped:{deduped} saved:{', '.join(targets)}"
     )
+    log_throughput("Clickstream", records_in, time.perf_counter() - start, workers)
+    if nat:
+        logging.warning(f"Clickstream → {nat} click_time values could not be parsed (NaT)")
+    if newer.skipped:
+        logging.warning(f"Clickstream → dropped {newer.skipped} rows at or before {newer.cutoff} "
+                        f"(watermark {newer.since}); they are not ingested")
+    if event_day is not None:
+        logging.info(f"Clickstream → skipped {on_day.skipped} rows with click_time outside {event_day}")
 
     # Upload to GCS partitioned by ingest_date
-    gcs_path = f"processed/clickstream/ingest_date={INGEST_DATE}/clickstream.csv"
-    upload_to_gcs(local_out, gcs_path)
+    if not stream_upload:
+        with spans.span("upload", nbytes=writer.bytes_written):
+            upload_to_gcs(local_out, gcs_path)
 
     # Log run
-    log_run("clickstream", records_in, after, "success")
+    spans.add("read_transform", nbytes=input_bytes(parts, size, offset))
+    spans.add("write", nbytes=writer.bytes_written)
+    spans.log_summary("Clickstream")
+    log_run("clickstream", records_in, after, "success", rows_filtered=filtered, timestamps_coerced=nat,
+            ingest_date=ingest_date, **shard_metrics(parts), **spans.columns())
+    remove_parts(parts, fs)
+    if rollup is not None:
+        # Only a run that actually resumed from a watermark saw a subset of each day's rows
+        save_rollup(rollup, ingest_date, newer.since is not None, rollup_root(BUCKET_NAME))
+
+    if incremental:
+        save_watermark("clickstream", newer.next_watermark(CLICKSTREAM_PATH, size), watermark_root(BUCKET_NAME))
+    if event_day is None:
+        save_fingerprint("clickstream", CLICKSTREAM_PATH, fingerprint, fingerprint_root(BUCKET_NAME))
+
+    return {"status": "success", "rows_in": records_in, "filtered": filtered, "rows_out": after,
+            "deduped": deduped, "timestamps_coerced": nat, "output": gcs_path, "schema": writer.dtypes}
+
 
+# Committed processed output of a dataset for an ingest date (what the downstream stages read)
+def processed_output_uri(dataset: str, output_format: str = OUTPUT_FORMAT, ingest_date: str = None) -> str:
+    ingest_date = ingest_date or INGEST_DATE
+    ext = FILE_EXTENSIONS[output_format]
+    return f"gs://{BUCKET_NAME}/processed/{dataset}/ingest_date={ingest_date}/{dataset}.{ext}"
 
-# Extract, clean, enrich, deduplicate, and load transactions dataset (Tasks 2–4)
-def process_transactions(rates: dict) -> pd.DataFrame:
-    fs = gcsfs.GCSFileSystem()
+# Stream a processed output (CSV or Parquet) back in typed chunks of CHUNK_SIZE rows
+def read_output_chunks(fs, source: str, schema, columns: list = None):
+    with fs.open(source, "rb") as src:
+        if source.endswith(".parquet"):
+            import pyarrow.parquet as pq
+            for batch in pq.ParquetFile(src).iter_batches(batch_size=CHUNK_SIZE, columns=columns):
+                yield batch.to_pandas()
+            return
+        dtype = {c: t for c, t in schema.columns.items() if c != schema.timestamp_column}
+        for chunk in pd.read_csv(src, chunksize=CHUNK_SIZE, usecols=columns, dtype=dtype):
+            chunk[schema.timestamp_column] = pd.to_datetime(chunk[schema.timestamp_column], utc=True, errors="coerce")
+            yield chunk
+
+# Sessionize the cleaned clickstream into one row per (user_id, session_id)
+def process_sessions(source: str = None, output_format=OUTPUT_FORMAT, stream_upload=STREAM_UPLOAD,
+                     partitions=SESSION_PARTITIONS, ingest_date: str = None) -> dict:
+    """
+    The clicks are streamed into per-partition spool files by user_id hash (a session never
+    spans two partitions), then each partition is sessionized and appended to the output.
+
+    Args:
+        source (str, optional): Cleaned clickstream file (default: the ingest date's committed clickstream output)
+        partitions (int): User-id hash partitions; raise it when one partition no longer fits in memory
+        ingest_date (str, optional): ISO date of the output partition (default INGEST_DATE, i.e. today)
+
+    Returns:
+        dict: summary {status, rows_in, rows_out, dropped, output, schema},
+        or None if there is no clickstream output to sessionize
+    """
+    ingest_date = ingest_date or INGEST_DATE
+    source = source or processed_output_uri("clickstream", output_format, ingest_date)
+    fs = get_gcsfs()
+
+    if not fs.exists(source):
+        logging.warning(f"Missing clickstream output: {source}")
+        return None
+
+    ensure_dir(LOCAL_PROCESSED_DIR)
+    ext = FILE_EXTENSIONS[output_format]
+    local_out = os.path.join(LOCAL_PROCESSED_DIR, f"sessions_{ingest_date}.{ext}")
+    gcs_path = f"processed/sessions/ingest_date={ingest_date}/sessions.{ext}"
+    targets = output_targets(local_out, gcs_path, stream_upload)
+
+    spans = SpanRecorder()
+    dropped = 0
+    with tempfile.TemporaryDirectory(dir=SPOOL_DIR) as spool_dir, \
+            PartitionSpool(spool_dir, "clicks", partitions, ["page_url"]) as clicks:
+        with spans.span("spool", nbytes=fs.size(source)):
+            for chunk in read_output_chunks(fs, source, CLICKSTREAM_SCHEMA, CLICK_COLUMNS):
+                clicks.write(chunk)
+        clicks.close()
+        spans.add("spool", rows=clicks.rows)
+
+        with open_writer(targets, output_format, ["entry_page", "exit_page"], PARQUET_COMPRESSION,
+                         UPLOAD_PART_SIZE, fs) as writer:
+            for partition in range(partitions):
+                part = clicks.read(partition)
+                if part is None:
+                    continue
+                with spans.span("sessionize", len(part)):
+                    sessions, part_dropped = sessionize(part)
+                dropped += part_dropped
+                if len(sessions) or writer.chunks == 0:  # the first write also fixes the schema
+                    with spans.span("write", len(sessions)):
+                        writer.write(sessions)
+    spans.add("write", nbytes=writer.bytes_written)
+
+    logging.info(f"Sessions → clicks:{clicks.rows} sessions:{writer.rows} partitions:{partitions} "
+                 f"saved:{', '.join(targets)}")
+    if dropped:
+        logging.warning(f"Sessions → {dropped} clicks without user_id/session_id/click_time left out")
+
+    if not stream_upload:
+        with spans.span("upload", nbytes=writer.bytes_written):
+            upload_to_gcs(local_out, gcs_path)
+
+    spans.log_summary("Sessions")
+    log_run("sessions", clicks.rows, writer.rows, "success", clicks_dropped=dropped, partitions=partitions,
+            ingest_date=ingest_date, **spans.columns())
+
+    return {"status": "success", "rows_in": clicks.rows, "rows_out": writer.rows, "dropped": dropped,
+            "output": gcs_path, "schema": writer.dtypes}
+
+# Sessions follow a clickstream run that wrote new output (an unchanged input keeps yesterday's sessions)
+def run_sessions_stage(clickstream: dict, timings: dict, options: dict, ingest_date: str = None) -> None:
+    if SESSIONIZE and clickstream and clickstream["status"] == "success":
+        label = f"process_sessions[{ingest_date}]" if ingest_date else "process_sessions"
+        _, timings["process_sessions"] = run_stage(label, process_sessions, ingest_date=ingest_date,
+                                                   **{k: options[k] for k in ("output_format", "stream_upload")
+                                                      if k in options})
+
+# Extract, clean, enrich, deduplicate, and load transactions dataset as a chunked stream (Tasks 2–4)
+def process_transactions(rates: dict, dedup_key=TRANSACTIONS_DEDUP_KEY,
+                         output_format=OUTPUT_FORMAT, as_of=AS_OF_CONVERSION,
+                         stream_upload=STREAM_UPLOAD, workers=TRANSFORM_WORKERS,
+                         use_schema=USE_SCHEMAS, incremental=INCREMENTAL, reset=False,
+                         skip_unchanged=SKIP_UNCHANGED, force=False, validate=VALIDATE_TRANSACTIONS,
+                         parts=None, ingest_date: str = None, rollup=ROLLUPS, event_day: str = None,
+                         max_quarantine_rate=MAX_QUARANTINE_RATE) -> dict:
+    """
+    Stream TRANSACTIONS_PATH in CHUNK_SIZE pieces: standardize, parse txn_time,
+    enrich with amount_in_usd, drop duplicates, validate and append each chunk
+    to the local output, so peak memory is bounded by one chunk. Rows failing
+    a validation rule go to the quarantine partition instead.
+
+    Args:
+        rates (dict): USD-based conversion rates
+        dedup_key (list, optional): columns identifying a duplicate; None compares whole rows
+        output_format (str): 'csv' or 'parquet'
+        as_of (bool): convert with the archived rate valid at each txn_time (see rate_history)
+        stream_upload (bool): write chunks directly to GCS instead of a local file + upload
+        workers (int): processes transforming chunks in parallel (dedup and writes stay ordered)
+        use_schema (bool): typed reads driven by schemas.TRANSACTIONS_SCHEMA
+        incremental (bool): only process rows newer than the stored txn_time watermark
+        reset (bool): with incremental, drop the stored watermark and backfill from scratch
+        skip_unchanged (bool): skip when the input fingerprint matches the last successful run
+        force (bool): process even if the input is unchanged
+        validate (bool): enforce validation.TRANSACTION_RULES, quarantining failing rows
+        max_quarantine_rate (float, optional): with validate, raise ValueError (FAIL) when a larger share
+            of the validated rows is quarantined; the output, rollup, watermark and fingerprint are then
+            not committed, so a retry reprocesses the input
+        parts (list, optional): process_shard results to merge instead of reading TRANSACTIONS_PATH
+        ingest_date (str, optional): ISO date of the output partition (default INGEST_DATE, i.e. today)
+        rollup (bool): update the transactions_daily rollup from the written (valid) chunks
+        event_day (str, optional): keep only transactions on this ISO date (backfills); the input's
+            fingerprint is then not recorded, so the next daily run still processes it
+
+    Returns:
+        dict: summary {status, validation_status, rows_in (read), filtered (watermark/event_day),
+        rows_validated, rows_out, deduped, timestamps_coerced, quarantined, rule_failures, output,
+        quarantine_output, schema}, or None if the input is missing
+    """
+    ingest_date = ingest_date or INGEST_DATE
+    fs = get_gcsfs()
 
     if not fs.exists(TRANSACTIONS_PATH):
         logging.warning(f"Missing input: {TRANSACTIONS_PATH}")
         return None
 
+    config = processing_config("transactions", rates, output_format=output_format, use_schema=use_schema,
+                               dedup_key=dedup_key, as_of=as_of, validate=validate,
+                               max_quarantine_rate=max_quarantine_rate)
+    fingerprint, unchanged = check_unchanged(
+        "transactions", fs, TRANSACTIONS_PATH, skip_unchanged and not (force or reset), config)
+    if unchanged:
+        logging.info("Transactions → input unchanged since last successful run; skipping.")
+        log_run("transactions", 0, 0, "skipped-unchanged", ingest_date=ingest_date)
+        return {"status": "skipped-unchanged", "validation_status": None, "rows_in": 0, "filtered": 0,
+                "rows_validated": 0, "rows_out": 0, "deduped": 0, "timestamps_coerced": 0, "quarantined": 0,
+                "rule_failures": {}, "output": None, "quarantine_output": None, "schema": None}
+
     ensure_dir(LOCAL_PROCESSED_DIR)
+    ext = FILE_EXTENSIONS[output_format]
+    local_out = os.path.join(LOCAL_PROCESSED_DIR, f"transactions_clean_{ingest_date}.{ext}")
+    gcs_path = f"processed/transactions/ingest_date={ingest_date}/transactions.{ext}"
+    targets = output_targets(local_out, gcs_path, stream_upload)
 
-    df = pd.read_csv(
-        TRANSACTIONS_PATH,
-        storage_options={"token": "cloud"}
-    )
+    # Quarantine writer is opened on the first failing row, so clean runs write no empty file
+    ensure_dir(LOCAL_QUARANTINE_DIR)
+    local_quarantine = os.path.join(LOCAL_QUARANTINE_DIR, f"transactions_quarantine_{ingest_date}.{ext}")
+    gcs_quarantine = f"quarantine/transactions/ingest_date={ingest_date}/transactions.{ext}"
+    quarantine = None
 
-    records_in = len(df)
-    df = standardize_columns(df)
-
-    if "txn_time" in df.columns:
-        df["txn_time"] = pd.to_datetime(df["txn_time"], utc=True, errors="coerce")
-
-    if {"amount", "currency"}.issubset(df.columns):
-        def to_usd(row):
-            cur = str(row["currency"]).upper()
-            amt = row["amount"]
-            rate = rates.get(cur)
-            if rate and rate != 0:
-                return amt / rate
-            return pd.NA
-        df["amount_in_usd"] = df.apply(to_usd, axis=1)
-
-        missing_cur = sorted(c for c in df["currency"].str.upper().unique() if c not in rates)
-        if missing_cur:
-            logging.warning(f"No rates for currencies: {missing_cur}")
-    else:
-        logging.warning("Expected 'amount' and 'currency' not found; skipping enrichment.")
+    dedup = StreamingDeduplicator(dedup_key)
+    validator = RuleValidator() if validate else None
+    missing_cur = set()
+    nat, rows_read = 0, 0
+    enrich = None
+    history = load_rate_history(RAW_API_DIR) if as_of else None
+
+    watermark = start_watermark("transactions", TRANSACTIONS_PATH, incremental, reset)
+    size = fs.size(TRANSACTIONS_PATH)
+    offset = start_offset(watermark, size)
+    newer = WatermarkFilter("txn_time", watermark, WATERMARK_LATENESS, resumed=parts is None and offset > 0)
+    on_day = EventDayFilter("txn_time", event_day)
+
+    # Per-stage wall/CPU/RSS/bytes/rows, persisted as run-log columns (spans.py; ETL_SPANS=0 disables)
+    spans = SpanRecorder()
+    start = time.perf_counter()
+
+    # Daily transaction count / USD revenue per currency, aggregated from each written chunk
+    rollup = transactions_rollup() if rollup else None
+
+    with ExitStack() as stack, \
+            open_writer(targets, output_format, TRANSACTIONS_SCHEMA.dictionary_columns,
+                        PARQUET_COMPRESSION, UPLOAD_PART_SIZE, fs) as writer:
+        if parts is None:
+            src = stack.enter_context(fs.open(TRANSACTIONS_PATH, "rb"))
+            reader = read_chunks(src, TRANSACTIONS_SCHEMA if use_schema else None, offset)
+            time_format, reader = peek_timestamp_format(reader, "txn_time", (TRANSACTIONS_PATH, "txn_time"))
+            transform = partial(transform_transactions_chunk, rates=rates, history=history,
+                                time_format=time_format, standardize=not use_schema)
+            chunks = map_chunks(reader, transform, workers)
+        else:
+            chunks = read_parts(parts, CHUNK_SIZE, fs)
+
+        for chunk, stats in spans.timed_iter("read_transform", chunks):
+            spans.add("read_transform", rows=len(chunk))
+            rows_read += len(chunk)
+            if enrich is None:
+                enrich = "amount_in_usd" in chunk.columns
+                if not enrich:
+                    logging.warning("Expected 'amount' and 'currency' not found; skipping enrichment.")
+            missing_cur.update(stats["missing"])
+            nat += stats["nat"]
 
-    before = len(df)
-    df = df.drop_duplicates()
-    after = len(df)
-    deduped = before - after
+            with spans.span("dedup", len(chunk)):
+                chunk = dedup.drop_duplicates(newer.apply(on_day.apply(chunk)))
+            if validator is not None:
+                with spans.span("validate", len(chunk)):
+                    chunk, rejected = validator.split(chunk)
+                if len(rejected):
+                    if quarantine is None:
+                        quarantine = stack.enter_context(open_writer(
+                            output_targets(local_quarantine, gcs_quarantine, stream_upload), output_format,
+                            TRANSACTIONS_SCHEMA.dictionary_columns, PARQUET_COMPRESSION, UPLOAD_PART_SIZE, fs))
+                    with spans.span("write", len(rejected)):
+                        quarantine.write(rejected)
+            with spans.span("write", len(chunk)):
+                writer.write(chunk)
+            if rollup is not None:
+                with spans.span("rollup", len(chunk)):
+                    rollup.update(chunk)
 
-    local_out = os.path.join(LOCAL_PROCESSED_DIR, f"transactions_clean_{INGEST_DATE}.csv")
-    df.to_csv(local_out, index=False)
-    logging.info(f"Transactions → in:{records_in} out:{after} deduped:{deduped} saved:{local_out}")
+    if writer.chunks == 0:
+        logging.warning("No transaction chunks read.")
+        return None
+
+    if missing_cur:
+        logging.warning(f"No rates for currencies: {sorted(missing_cur)}")
+
+    records_in, filtered = rows_read, newer.skipped + on_day.skipped
+    records_out, deduped = dedup.rows_out, dedup.deduped
+    logging.info(
+        f"Transactions → in:{records_in} filtered:{filtered} out:{records_out} deduped:{deduped} "
+        f"saved:{', '.join(targets)}"
+    )
+    log_throughput("Transactions", records_in, time.perf_counter() - start, workers)
+    if nat:
+        logging.warning(f"Transactions → {nat} txn_time values could not be parsed (NaT)")
+    if newer.skipped:
+        logging.warning(f"Transactions → dropped {newer.skipped} rows at or before {newer.cutoff} "
+                        f"(watermark {newer.since}); they are not ingested")
+    if event_day is not None:
+        logging.info(f"Transactions → skipped {on_day.skipped} rows with txn_time outside {event_day}")
+
+    # Rows that reached validation (after the filters and dedup) are what the quarantine rate is taken over
+    quarantined, rule_failures, rows_validated, status = 0, {}, records_out, "success"
+    if validator is not None:
+        quarantined, rule_failures = validator.rows_quarantined, validator.summary()["failures"]
+        rows_validated, records_out = validator.rows_in, validator.rows_valid
+        status = validator.status(max_quarantine_rate)
+    if quarantined:
+        logging.warning(f"Transactions → quarantined {quarantined} rows {rule_failures} → {gcs_quarantine}")
 
-    gcs_path = f"processed/transactions/ingest_date={INGEST_DATE}/transactions.csv"
-    upload_to_gcs(local_out, gcs_path)
+    # The quarantine is kept for inspection either way; a FAIL publishes nothing else
+    if not stream_upload:
+        if status != "FAIL":
+            with spans.span("upload", nbytes=writer.bytes_written):
+                upload_to_gcs(local_out, gcs_path)
+        if quarantine is not None:
+            with spans.span("upload", nbytes=quarantine.bytes_written):
+                upload_to_gcs(local_quarantine, gcs_quarantine)
 
     # Log run
-    log_run("transactions", records_in, after, "success")
+    spans.add("read_transform", nbytes=input_bytes(parts, size, offset))
+    spans.add("write", nbytes=writer.bytes_written + (quarantine.bytes_written if quarantine is not None else 0))
+    spans.log_summary("Transactions")
+    log_run("transactions", records_in, records_out, status, rows_filtered=filtered, timestamps_coerced=nat,
+            ingest_date=ingest_date, rows_validated=rows_validated, rows_quarantined=quarantined,
+            rule_failures=json.dumps(rule_failures), **shard_metrics(parts), **spans.columns())
 
-    return df 
+    # Nothing is committed on a FAIL: parts, rollup, watermark and fingerprint stay as they were for the retry
+    if status == "FAIL":
+        raise ValueError(
+            f"Validation failed for transactions: {validator.quarantine_rate:.1%} of {rows_validated} rows "
+            f"quarantined (max {max_quarantine_rate:.0%}) {rule_failures}"
+        )
+    remove_parts(parts, fs)
+    if rollup is not None:
+        # Only a run that actually resumed from a watermark saw a subset of each day's rows
+        save_rollup(rollup, ingest_date, newer.since is not None, rollup_root(BUCKET_NAME))
 
-# Main - Run the full ETL pipeline (Tasks 2–5)
-def main():
-    logging.info("Starting ETL pipeline (Week 1)")
-    rates = fetch_exchange_rates()
+    if incremental:
+        save_watermark("transactions", newer.next_watermark(TRANSACTIONS_PATH, size), watermark_root(BUCKET_NAME))
+    if event_day is None:
+        save_fingerprint("transactions", TRANSACTIONS_PATH, fingerprint, fingerprint_root(BUCKET_NAME))
+
+    return {"status": "success", "validation_status": status if validator is not None else None,
+            "rows_in": records_in, "filtered": filtered, "rows_validated": rows_validated, "rows_out": records_out,
+            "deduped": deduped, "timestamps_coerced": nat, "quarantined": quarantined, "rule_failures": rule_failures,
+            "output": gcs_path, "quarantine_output": gcs_quarantine if quarantine is not None else None,
+            "schema": writer.dtypes}
+
+# Attribute each processed transaction to the user's last click before it (see attribution.py)
+def process_attribution(clicks_source: str = None, transactions_source: str = None, lookback=ATTRIBUTION_LOOKBACK,
+                        partitions=ATTRIBUTION_PARTITIONS, output_format=OUTPUT_FORMAT,
+                        stream_upload=STREAM_UPLOAD, ingest_date: str = None) -> dict:
+    """
+    Both outputs are streamed into per-partition spool files by user_id hash, then each
+    partition is joined with one sorted merge_asof and appended to the enriched output.
+
+    Args:
+        clicks_source (str, optional): Cleaned clickstream file (default: the ingest date's committed output)
+        transactions_source (str, optional): Processed transactions file (default: likewise)
+        lookback (pd.Timedelta, optional): Oldest click that may be credited; None for any earlier click
+        partitions (int): User-id hash partitions; raise it when one partition no longer fits in memory
+        ingest_date (str, optional): ISO date of the output partition (default INGEST_DATE, i.e. today)
+
+    Returns:
+        dict: summary {status, rows_in, rows_out, attributed, output, schema},
+        or None if either processed output is missing
+    """
+    ingest_date = ingest_date or INGEST_DATE
+    clicks_source = clicks_source or processed_output_uri("clickstream", output_format, ingest_date)
+    transactions_source = transactions_source or processed_output_uri("transactions", output_format, ingest_date)
+    fs = get_gcsfs()
+
+    for source in (clicks_source, transactions_source):
+        if not fs.exists(source):
+            logging.warning(f"Missing processed output: {source}")
+            return None
+
+    ensure_dir(LOCAL_PROCESSED_DIR)
+    ext = FILE_EXTENSIONS[output_format]
+    local_out = os.path.join(LOCAL_PROCESSED_DIR, f"attributed_transactions_{ingest_date}.{ext}")
+    gcs_path = f"processed/attributed_transactions/ingest_date={ingest_date}/attributed_transactions.{ext}"
+    targets = output_targets(local_out, gcs_path, stream_upload)
+
+    spans = SpanRecorder()
+    attributed = 0
+    with tempfile.TemporaryDirectory(dir=SPOOL_DIR) as spool_dir, \
+            PartitionSpool(spool_dir, "clicks", partitions, ["page_url"]) as clicks, \
+            PartitionSpool(spool_dir, "transactions", partitions, TRANSACTIONS_SCHEMA.dictionary_columns) as txns:
+        with spans.span("spool", nbytes=fs.size(clicks_source) + fs.size(transactions_source)):
+            for chunk in read_output_chunks(fs, clicks_source, CLICKSTREAM_SCHEMA, CLICK_COLUMNS):
+                clicks.write(chunk)
+            for chunk in read_output_chunks(fs, transactions_source, TRANSACTIONS_SCHEMA):
+                txns.write(chunk)
+        clicks.close()
+        txns.close()
+        spans.add("spool", rows=clicks.rows + txns.rows)
+
+        with open_writer(targets, output_format, TRANSACTIONS_SCHEMA.dictionary_columns + ["attributed_page_url"],
+                         PARQUET_COMPRESSION, UPLOAD_PART_SIZE, fs) as writer:
+            for partition in range(partitions):
+                part = txns.read(partition)
+                if part is None:
+                    continue
+                with spans.span("attribute", len(part)):
+                    part = attribute(part, clicks.read(partition), lookback,
+                                     CLICKSTREAM_SCHEMA.columns["session_id"])
+                attributed += int(part["attributed_click_time"].notna().sum())
+                with spans.span("write", len(part)):
+                    writer.write(part)
+    spans.add("write", nbytes=writer.bytes_written)
+
+    logging.info(f"Attribution → transactions:{txns.rows} attributed:{attributed} clicks:{clicks.rows} "
+                 f"partitions:{partitions} saved:{', '.join(targets)}")
+
+    if not stream_upload:
+        with spans.span("upload", nbytes=writer.bytes_written):
+            upload_to_gcs(local_out, gcs_path)
+
+    spans.log_summary("Attribution")
+    log_run("attribution", txns.rows, txns.rows, "success", rows_attributed=attributed, partitions=partitions,
+            lookback_s=lookback.total_seconds() if lookback is not None else None, ingest_date=ingest_date,
+            **spans.columns())
+
+    return {"status": "success", "rows_in": txns.rows, "rows_out": txns.rows, "attributed": attributed,
+            "output": gcs_path, "schema": writer.dtypes}
+
+# Attribution follows once both datasets wrote new output for the date
+def run_attribution_stage(clickstream: dict, transactions: dict, timings: dict, options: dict,
+                          ingest_date: str = None) -> None:
+    if ATTRIBUTE_TRANSACTIONS and all(s and s["status"] == "success" for s in (clickstream, transactions)):
+        label = f"process_attribution[{ingest_date}]" if ingest_date else "process_attribution"
+        _, timings["process_attribution"] = run_stage(label, process_attribution, ingest_date=ingest_date,
+                                                      **{k: options[k] for k in ("output_format", "stream_upload")
+                                                         if k in options})
+
+# Run one pipeline stage and log its wall-clock time
+def run_stage(name: str, fn, *args, **kwargs) -> tuple:
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    logging.info(f"Stage {name} finished in {elapsed:.2f}s")
+    return result, elapsed
+
+# Stages one after another (default; easiest to debug)
+# `options` are keyword arguments shared by process_clickstream and process_transactions
+def run_sequential(options: dict = None) -> dict:
+    options = options or {}
+    timings = {}
+    rates, timings["fetch_exchange_rates"] = run_stage("fetch_exchange_rates", fetch_exchange_rates)
     logging.info("Exchange rates fetched")
+    clickstream, timings["process_clickstream"] = run_stage("process_clickstream", process_clickstream, **options)
+    run_sessions_stage(clickstream, timings, options)
+    transactions, timings["process_transactions"] = run_stage("process_transactions", process_transactions, rates,
+                                                              **options)
+    run_attribution_stage(clickstream, transactions, timings, options)
+    return timings
+
+# Clickstream runs in a worker process while rates are fetched, then transactions follows
+def run_concurrent(workers: int, options: dict = None) -> dict:
+    options = options or {}
+    timings = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        clickstream = pool.submit(run_stage, "process_clickstream", process_clickstream, **options)
 
-    process_clickstream()
-    process_transactions(rates)
+        rates, timings["fetch_exchange_rates"] = run_stage("fetch_exchange_rates", fetch_exchange_rates)
+        logging.info("Exchange rates fetched")
+        transactions = pool.submit(run_stage, "process_transactions", process_transactions, rates, **options)
+
+        clickstream, timings["process_clickstream"] = clickstream.result()
+        run_sessions_stage(clickstream, timings, options)
+        transactions, timings["process_transactions"] = transactions.result()
+    run_attribution_stage(clickstream, transactions, timings, options)
+    return timings
+
+# Full pipeline for one past ingest date, written to that date's ingest_date= partitions
+# The inputs are undated, so each date keeps only the rows whose event time falls on it
+def run_date(day: str, options: dict = None) -> dict:
+    options = options or {}
+    timings = {}
+    rates, timings["fetch_exchange_rates"] = run_stage(f"fetch_exchange_rates[{day}]", fetch_exchange_rates,
+                                                       ingest_date=day)
+    clickstream, timings["process_clickstream"] = run_stage(f"process_clickstream[{day}]", process_clickstream,
+                                                            ingest_date=day, event_day=day, **options)
+    run_sessions_stage(clickstream, timings, options, day)
+    transactions, timings["process_transactions"] = run_stage(f"process_transactions[{day}]", process_transactions,
+                                                              rates, ingest_date=day, event_day=day, **options)
+    run_attribution_stage(clickstream, transactions, timings, options, day)
+    return timings
+
+# Backfill an inclusive date range, `parallelism` dates at a time in a process pool
+def run_backfill(start: str, end: str, parallelism: int = 2, options: dict = None) -> dict:
+    """
+    Each date fetches its own historical rates and writes its own partitions,
+    holding only the input rows whose event time falls on that date.
+    Runs are forced (the same input would otherwise be skipped as unchanged
+    after the first date) and never incremental (dates would race on one watermark).
+
+    Returns:
+        dict: {date: per-stage timings}; raises RuntimeError naming the dates that failed
+    """
+    days = [d.strftime("%Y-%m-%d") for d in pd.date_range(start, end, freq="D")]
+    if not days:
+        raise ValueError(f"Empty backfill range {start}..{end}")
+    options = {**(options or {}), "force": True, "incremental": False, "reset": False}
+
+    # Historical rates for every date in one concurrent, rate-limited batch
+    missing = [d for d in days if not os.path.isfile(os.path.join(RAW_API_DIR, d, "rates.json"))]
+    if missing:
+        fetch_rate_payloads(["USD"], missing)
+
+    logging.info(f"Backfilling {len(days)} date(s) {days[0]}..{days[-1]} with parallelism {parallelism}")
+    results, failed = {}, []
+    if parallelism <= 1:
+        for day in days:
+            try:
+                results[day] = run_date(day, options)
+            except Exception as e:
+                logging.error(f"Backfill of {day} failed: {e}")
+                failed.append(day)
+    else:
+        with ProcessPoolExecutor(max_workers=parallelism) as pool:
+            futures = {pool.submit(run_date, day, options): day for day in days}
+            for future, day in futures.items():
+                try:
+                    results[day] = future.result()
+                except Exception as e:
+                    logging.error(f"Backfill of {day} failed: {e}")
+                    failed.append(day)
+
+    if failed:
+        raise RuntimeError(f"Backfill failed for {len(failed)} date(s): {failed}")
+    return results
+
+# Compact the shared stores once per pipeline run, after every stage (never from the stages or their processes)
+def compact_stores() -> None:
+    maybe_compact_run_log(run_log_root(BUCKET_NAME))
+    maybe_compact_run_log(alerts_root(BUCKET_NAME))
+    compact_rollups(rollup_root(BUCKET_NAME))
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the clickstream + transactions ETL pipeline.")
+    parser.add_argument("--mode", choices=["sequential", "concurrent"], default="sequential",
+                        help="Run stages one by one (default) or overlap them in a process pool")
+    parser.add_argument("--workers", type=int, default=2,
+                        help="Worker processes for --mode concurrent")
+    parser.add_argument("--transform-workers", type=int, default=TRANSFORM_WORKERS,
+                        help="Processes transforming CSV chunks within each dataset")
+    parser.add_argument("--incremental", action="store_true", default=INCREMENTAL,
+                        help="Only ingest rows newer than each dataset's stored watermark")
+    parser.add_argument("--reset-watermark", action="store_true",
+                        help="With --incremental, forget stored watermarks and backfill from scratch")
+    parser.add_argument("--force", action="store_true",
+                        help="Process inputs even if their fingerprint matches the last successful run")
+    parser.add_argument("--start", help="Backfill from this ISO date (inclusive) instead of running today")
+    parser.add_argument("--end", help="Last ISO date to backfill (inclusive; default --start)")
+    parser.add_argument("--parallelism", type=int, default=2,
+                        help="Dates processed concurrently during a backfill")
+    return parser.parse_args(argv)
+
+# Main - Run the full ETL pipeline (Tasks 2–5)
+def main(argv=None):
+    args = parse_args(argv)
+    start = time.perf_counter()
+    if args.start:
+        results = run_backfill(args.start, args.end or args.start, args.parallelism,
+                               {"workers": args.transform_workers})
+        logging.info(f"Backfill of {len(results)} date(s) finished in {time.perf_counter() - start:.2f}s")
+        compact_stores()
+        return
+
+    logging.info(f"Starting ETL pipeline (Week 1, {args.mode})")
+
+    options = {
+        "workers": args.transform_workers,
+        "incremental": args.incremental or args.reset_watermark,
+        "reset": args.reset_watermark,
+        "force": args.force,
+    }
+    if args.mode == "concurrent":
+        timings = run_concurrent(args.workers, options)
+    else:
+        timings = run_sequential(options)
 
-    logging.info("ETL pipeline finished")
+    stages = ", ".join(f"{name}={secs:.2f}s" for name, secs in timings.items())
+    logging.info(f"ETL pipeline finished in {time.perf_counter() - start:.2f}s ({stages})")
+    compact_stores()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,88 @@
+"""
+fingerprints.py
+---------------
+Input fingerprints for skipping unchanged source files.
+
+A fingerprint is the identifying metadata `fs.info` returns for the input
+object: its GCS generation, size and md5/crc32c checksums (size and mtime on
+a local filesystem), plus a short hash of the processing settings the
+output depends on (output format, schemas, dedup key, validation rules,
+rates...), so a config change reprocesses an otherwise unchanged input.
+The fingerprint of the last successfully processed input is stored per
+dataset in the metadata store:
+
+    gs://<bucket>/metadata/fingerprints/<dataset>.json
+
+and a run whose input fingerprint matches it can stop before downloading or
+parsing anything.
+
+Functions:
+    fingerprint_root(bucket)
+    config_hash(config)
+    input_fingerprint(fs, path, config)
+    load_fingerprint(dataset, root, fs)
+    save_fingerprint(dataset, source, fingerprint, root, fs)
+    is_unchanged(dataset, source, fingerprint, root, fs)
+"""
+
+import json
+import hashlib
+import logging
+from datetime import datetime
+
+from clients import get_fs
+from run_log import DEFAULT_BUCKET
+
+# fs.info keys that identify object content (gcsfs first, local filesystem fallbacks last)
+FINGERPRINT_KEYS = ("generation", "size", "md5Hash", "crc32c", "etag", "mtime")
+
+
+def fingerprint_root(bucket: str = DEFAULT_BUCKET) -> str:
+    return f"gs://{bucket}/metadata/fingerprints"
+
+
+def _path(dataset: str, root: str) -> str:
+    return f"{root.split('://', 1)[-1]}/{dataset}.json"
+
+
+def config_hash(config: dict) -> str:
+    """Stable short hash of a settings dict (keys sorted, non-JSON values by str())."""
+    payload = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def input_fingerprint(fs, path: str, config: dict = None) -> dict:
+    """Return the identifying fs.info fields of an input object, plus config_hash(config) when given."""
+    info = fs.info(path)
+    fingerprint = {k: str(info[k]) for k in FINGERPRINT_KEYS if info.get(k) is not None}
+    if fingerprint and config is not None:
+        fingerprint["config"] = config_hash(config)
+    return fingerprint
+
+
+def load_fingerprint(dataset: str, root: str = None, fs=None) -> dict:
+    """Return the stored {source, fingerprint, recorded_at} for a dataset, or None."""
+    root = root or fingerprint_root()
+    fs = fs or get_fs(root)
+    path = _path(dataset, root)
+    if not fs.exists(path):
+        return None
+    return json.loads(fs.cat(path))
+
+
+def save_fingerprint(dataset: str, source: str, fingerprint: dict, root: str = None, fs=None) -> None:
+    """Record the fingerprint of a successfully processed input."""
+    root = root or fingerprint_root()
+    fs = fs or get_fs(root)
+    record = {"source": source, "fingerprint": fingerprint, "recorded_at": datetime.utcnow().isoformat()}
+    fs.pipe(_path(dataset, root), json.dumps(record).encode("utf-8"))
+
+
+def is_unchanged(dataset: str, source: str, fingerprint: dict, root: str = None, fs=None) -> bool:
+    """True when the input matches the last successfully processed one."""
+    last = load_fingerprint(dataset, root, fs)
+    unchanged = bool(fingerprint) and last is not None \
+        and last.get("source") == source and last.get("fingerprint") == fingerprint
+    if unchanged:
+        logging.info(f"{dataset} input {source} unchanged since {last.get('recorded_at')} ({fingerprint})")
+    return unchanged
@@ -13,7 +13,8 @@ import csv
 import os
 import logging
 from datetime import datetime
-from google.cloud import storage
+
+from run_log import run_log_root, alerts_root, write_run_segment
 
 # Local file paths
 METADATA_FILE = os.path.join("orchestration", "metadata", "run_log.csv")
@@ -22,7 +23,8 @@ ALERTS_FILE = os.path.join("orchestration", "metadata", "alerts.log")
 def log_metadata(dataset_name: str, rows_in: int, rows_out: int,
                  validation_status: str, gcs_bucket: str) -> None:
     """
-    Append ETL run metadata to run_log.csv and upload to GCS.
+    Append ETL run metadata to the local run_log.csv and write it to GCS as a
+    run-log segment (instead of re-uploading the whole CSV every time).
 
     Args:
         dataset_name (str): Name of dataset (e.g., 'clickstream')
@@ -43,16 +45,20 @@ def log_metadata(dataset_name: str, rows_in: int, rows_out: int,
             writer.writerow(["dataset", "rows_in", "rows_out", "validation_status", "timestamp"])
         writer.writerow(row)
 
-    client = storage.Client()
-    bucket = client.bucket(gcs_bucket)
-    blob = bucket.blob("metadata/run_log.csv")
-    blob.upload_from_filename(METADATA_FILE)
-    logging.info(f"Metadata logged for {dataset_name} → {METADATA_FILE} and uploaded to GCS.")
+    root = run_log_root(gcs_bucket)
+    write_run_segment({
+        "dataset": dataset_name,
+        "rows_in": rows_in,
+        "rows_out": rows_out,
+        "validation_status": validation_status,
+    }, root)
+    logging.info(f"Metadata logged for {dataset_name} → {METADATA_FILE} and {root}.")
 
 
 def log_alert(message: str, gcs_bucket: str) -> None:
     """
-    Append alert messages to alerts.log and upload to GCS.
+    Append an alert message to the local alerts.log and write it to GCS as its
+    own alert segment (instead of re-uploading the whole alerts.log every time).
 
     Args:
         message (str): Alert/error message
@@ -65,9 +71,7 @@ def log_alert(message: str, gcs_bucket: str) -> None:
     with open(ALERTS_FILE, "a") as f:
         f.write(formatted_message + "\n")
 
-    client = storage.Client()
-    bucket = client.bucket(gcs_bucket)
-    blob = bucket.blob("alerts/alerts.log")
-    blob.upload_from_filename(ALERTS_FILE)
+    root = alerts_root(gcs_bucket)
+    write_run_segment({"dataset": "alert", "message": message}, root)
 
-    logging.error(f"ALERT: {formatted_message} (also logged to GCS).")
+    logging.error(f"ALERT: {formatted_message} (also logged to {root}).")
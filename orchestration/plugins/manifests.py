@@ -0,0 +1,90 @@
+"""
+manifests.py
+------------
+Constant-size task manifests exchanged between DAG tasks via XCom.
+
+Tasks publish references to what they produced instead of the data itself:
+output URIs, row counts, the written schema and, for the rates task, the
+path of a rates snapshot in GCS:
+
+    gs://<bucket>/raw/api_currency/<ingest_date>/rates.json
+
+Downstream tasks read the snapshot (or the outputs) through the references,
+so the XCom payload stays the same size whatever the data volume.
+
+Functions:
+    rates_snapshot_uri(bucket, ingest_date)
+    save_rates_snapshot(rates, uri, fs)
+    load_rates(manifest, fs)
+    rates_manifest(uri, rates, ingest_date)
+    dataset_manifest(dataset, summary, bucket, ingest_date)
+"""
+
+import json
+from datetime import datetime
+
+from clients import get_fs
+
+MANIFEST_VERSION = 1
+
+
+def rates_snapshot_uri(bucket: str, ingest_date: str) -> str:
+    return f"gs://{bucket}/raw/api_currency/{ingest_date}/rates.json"
+
+
+def save_rates_snapshot(rates: dict, uri: str, fs=None) -> str:
+    """Write the conversion rates a run uses to uri and return it."""
+    fs = fs or get_fs(uri)
+    snapshot = {"conversion_rates": rates, "snapshot_at": datetime.utcnow().isoformat()}
+    fs.pipe(uri.split("://", 1)[-1], json.dumps(snapshot).encode("utf-8"))
+    return uri
+
+
+def load_rates(manifest: dict, fs=None) -> dict:
+    """Read the conversion rates referenced by a rates manifest."""
+    uri = manifest["snapshot"]
+    fs = fs or get_fs(uri)
+    return json.loads(fs.cat(uri.split("://", 1)[-1]))["conversion_rates"]
+
+
+def rates_manifest(uri: str, rates: dict, ingest_date: str) -> dict:
+    return {
+        "version": MANIFEST_VERSION,
+        "kind": "rates",
+        "ingest_date": ingest_date,
+        "snapshot": uri,
+        "currencies": len(rates),
+    }
+
+
+def dataset_manifest(dataset: str, summary: dict, bucket: str, ingest_date: str) -> dict:
+    """
+    Manifest for one processed dataset, built from a process_* summary.
+
+    Args:
+        dataset (str): Dataset name
+        summary (dict): Return value of process_clickstream / process_transactions (None if nothing was read)
+        bucket (str): Bucket the relative output paths live in
+        ingest_date (str): Partition the outputs were written to
+    """
+    summary = summary or {"status": "missing"}
+
+    def uri(path):
+        return f"gs://{bucket}/{path}" if path else None
+
+    return {
+        "version": MANIFEST_VERSION,
+        "kind": "dataset",
+        "dataset": dataset,
+        "ingest_date": ingest_date,
+        "status": summary["status"],
+        "validation_status": summary.get("validation_status"),
+        "output": uri(summary.get("output")),
+        "quarantine": uri(summary.get("quarantine_output")),
+        "rows_in": summary.get("rows_in", 0),
+        "rows_out": summary.get("rows_out", 0),
+        "deduped": summary.get("deduped", 0),
+        "quarantined": summary.get("quarantined", 0),
+        "rule_failures": summary.get("rule_failures") or {},
+        "schema": summary.get("schema"),
+    }
@@ -0,0 +1,43 @@
+"""
+parallel_chunks.py
+------------------
+Ordered parallel map over the chunks of a chunked CSV reader.
+
+One reader (the caller's pd.read_csv(..., chunksize=CHUNK_SIZE) iterator)
+feeds a pool of worker processes that run the per-chunk transform; results
+come back in input order, so stateful steps that must stay serial (streaming
+dedup, writing) keep working unchanged. At most `max_in_flight` chunks are
+outstanding at once, which bounds memory to a few chunks.
+
+Functions:
+    map_chunks(chunks, fn, workers, max_in_flight)
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+
+def map_chunks(chunks, fn, workers: int = 1, max_in_flight: int = None):
+    """
+    Yield fn(chunk) for every chunk, in order.
+
+    Args:
+        chunks (iterable): Chunk iterator, e.g. pd.read_csv(..., chunksize=...)
+        fn (callable): Picklable top-level function (or functools.partial of one)
+        workers (int): Worker processes; 1 or less runs fn inline
+        max_in_flight (int, optional): Chunks submitted but not yet yielded (default 2 × workers)
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield fn(chunk)
+        return
+
+    max_in_flight = max_in_flight or 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(fn, chunk))
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
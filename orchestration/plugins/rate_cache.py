@@ -0,0 +1,86 @@
+"""
+rate_cache.py
+-------------
+Cache for ExchangeRate API payloads, keyed to the API's own expiry.
+
+Every successful payload is already archived under
+RAW_API_DIR/<YYYY-MM-DD>/rates.json and carries `time_next_update_unix`
+(when the provider publishes new rates). Until that moment the archived
+payload is served instead of calling the API again, which also covers the
+second fetch inside the transactions task and Airflow retries on the same
+worker. Archive folders are scanned newest-first, skipping unreadable or
+incomplete payloads (historical backfill snapshots carry no expiry, failed
+or partial writes no rates), until a complete latest-rates payload is found.
+
+Classes:
+    RateCache(raw_dir)
+"""
+
+import os
+import json
+import time
+import logging
+
+
+class RateCache:
+    """
+    Serve the newest archived rates payload while it is still valid.
+
+    Attributes:
+        hits (int): lookups answered from memory or the archive
+        misses (int): lookups that require an API call
+    """
+
+    def __init__(self, raw_dir: str):
+        self.raw_dir = raw_dir
+        self.hits = 0
+        self.misses = 0
+        self._payload = None
+
+    @staticmethod
+    def is_complete(payload: dict) -> bool:
+        """A successful latest-rates payload: conversion rates plus the provider's next update time."""
+        return bool(payload) and payload.get("result") == "success" \
+            and bool(payload.get("conversion_rates")) and payload.get("time_next_update_unix") is not None
+
+    @classmethod
+    def is_valid(cls, payload: dict, now: float = None) -> bool:
+        return cls.is_complete(payload) \
+            and (now if now is not None else time.time()) < payload["time_next_update_unix"]
+
+    def _load_latest_archive(self) -> dict:
+        """Return the complete payload from the most recent dated archive folder that has one, if any."""
+        if not os.path.isdir(self.raw_dir):
+            return None
+        for day in sorted(os.listdir(self.raw_dir), reverse=True):
+            path = os.path.join(self.raw_dir, day, "rates.json")
+            if not os.path.isfile(path):
+                continue
+            try:
+                with open(path) as f:
+                    payload = json.load(f)
+            except (OSError, ValueError) as e:
+                logging.warning(f"Ignoring unreadable rates archive {path}: {e}")
+                continue
+            if self.is_complete(payload):
+                return payload
+            logging.info(f"Skipping incomplete rates archive {path}")
+        return None
+
+    def get(self, now: float = None) -> dict:
+        """Return a still-valid payload, or None when the API must be called."""
+        if not self.is_valid(self._payload, now):
+            self._payload = self._load_latest_archive()
+
+        if self.is_valid(self._payload, now):
+            self.hits += 1
+            return self._payload
+
+        self.misses += 1
+        return None
+
+    def put(self, payload: dict) -> None:
+        self._payload = payload
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,182 @@
+"""
+rate_fetcher.py
+---------------
+Concurrent ExchangeRate API fetcher for several base currencies and dates.
+
+Each (base, date) pair is one request: `latest/<BASE>` when date is None,
+otherwise `history/<BASE>/<YYYY>/<M>/<D>`. Requests run as asyncio tasks
+(the blocking `requests` call runs on a `concurrency`-sized thread pool, so
+no extra HTTP dependency is needed) with:
+
+- at most `concurrency` requests in flight (semaphore),
+- a token bucket capping the request rate to the API quota,
+- retries with full-jitter exponential backoff on network errors, HTTP 429
+  and 5xx responses.
+
+Every successful payload is archived in the existing layout:
+
+    <raw_dir>/<YYYY-MM-DD>/rates.json          (USD base, read by rate_cache / rate_history)
+    <raw_dir>/<YYYY-MM-DD>/rates_<BASE>.json   (other bases)
+
+Classes:
+    TokenBucket(rate, capacity)
+    RateFetchError
+
+Functions:
+    rate_url(base_url, api_key, base, day)
+    archive_path(raw_dir, day, base)
+    fetch_rates_async(bases, dates, api_key, base_url, raw_dir, ...)
+    fetch_rates(bases, dates, api_key, base_url, raw_dir, ...)
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import requests
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class RateFetchError(RuntimeError):
+    """A rates request failed permanently (bad key, unsupported code, retries exhausted)."""
+
+
+class TokenBucket:
+    """
+    Asyncio token bucket: `rate` requests per second with bursts up to `capacity`.
+
+    Args:
+        rate (float): Tokens added per second
+        capacity (int, optional): Bucket size (default max(1, rate))
+    """
+
+    def __init__(self, rate: float, capacity: int = None):
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def rate_url(base_url: str, api_key: str, base: str, day: str = None) -> str:
+    if day is None:
+        return f"{base_url}/{api_key}/latest/{base}"
+    d = date.fromisoformat(day)
+    return f"{base_url}/{api_key}/history/{base}/{d.year}/{d.month}/{d.day}"
+
+
+def archive_path(raw_dir: str, day: str, base: str) -> str:
+    name = "rates.json" if base == "USD" else f"rates_{base}.json"
+    return os.path.join(raw_dir, day, name)
+
+
+def _archive(payload: dict, raw_dir: str, day: str, base: str) -> str:
+    path = archive_path(raw_dir, day, base)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2)
+    return path
+
+
+def _get(session: requests.Session, url: str, timeout: float) -> tuple:
+    resp = session.get(url, timeout=timeout)
+    try:
+        data = resp.json()
+    except ValueError:
+        data = {"result": "error", "error-type": f"non-JSON response ({resp.status_code})"}
+    return resp.status_code, data
+
+
+async def _fetch_one(session, url: str, label: str, bucket: TokenBucket, semaphore: asyncio.Semaphore,
+                     pool: ThreadPoolExecutor, retries: int, backoff: float, timeout: float) -> dict:
+    loop = asyncio.get_running_loop()
+    for attempt in range(retries + 1):
+        async with semaphore:
+            await bucket.acquire()
+            try:
+                status, data = await loop.run_in_executor(pool, _get, session, url, timeout)
+            except requests.RequestException as e:
+                status, data = None, {"error-type": str(e)}
+
+        if status == 200 and data.get("result") == "success":
+            return data
+        retryable = status is None or status in RETRY_STATUS or data.get("error-type") == "quota-reached"
+        if not retryable or attempt == retries:
+            raise RateFetchError(f"{label} failed ({status}): {data.get('error-type')}")
+
+        delay = random.uniform(0, backoff * 2 ** attempt)  # full jitter
+        logging.warning(f"{label} failed ({status}: {data.get('error-type')}); retry {attempt + 1} in {delay:.2f}s")
+        await asyncio.sleep(delay)
+
+
+async def fetch_rates_async(bases, dates, api_key: str, base_url: str, raw_dir: str,
+                            ingest_date: str = None, concurrency: int = 4, rate_limit: float = 5.0,
+                            retries: int = 3, backoff: float = 0.5, timeout: float = 20) -> dict:
+    """
+    Fetch every (base, date) payload concurrently and archive it.
+
+    Args:
+        bases (list): Base currency codes, e.g. ["USD", "EUR"]
+        dates (list): ISO dates for historical rates; None or [None] fetches latest
+        api_key (str): ExchangeRate API key
+        base_url (str): API root, e.g. https://v6.exchangerate-api.com/v6 (or a local stub)
+        raw_dir (str): Archive root, e.g. 'data/raw/api_currency'
+        ingest_date (str, optional): Archive folder for latest payloads (default today)
+        concurrency (int): Requests in flight at once
+        rate_limit (float): Requests per second allowed by the token bucket
+        retries (int): Retries per request on retryable failures
+        backoff (float): Base delay in seconds for the jittered exponential backoff
+
+    Returns:
+        dict: {(base, date): payload}; raises RateFetchError if any request fails permanently
+    """
+    dates = list(dates or [None])
+    ingest_date = ingest_date or date.today().isoformat()
+    bucket = TokenBucket(rate_limit)
+    semaphore = asyncio.Semaphore(concurrency)
+    keys = [(base, day) for day in dates for base in bases]
+
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=concurrency) as pool:
+        adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        results = await asyncio.gather(
+            *(_fetch_one(session, rate_url(base_url, api_key, base, day), f"rates {base} {day or 'latest'}",
+                         bucket, semaphore, pool, retries, backoff, timeout) for base, day in keys),
+            return_exceptions=True,
+        )
+
+    payloads, errors = {}, []
+    for (base, day), result in zip(keys, results):
+        if isinstance(result, Exception):
+            errors.append(result)
+            continue
+        payloads[(base, day)] = result
+        _archive(result, raw_dir, day or ingest_date, base)
+
+    logging.info(f"Fetched {len(payloads)}/{len(keys)} rate payloads ({len(bases)} bases × {len(dates)} dates)")
+    if errors:
+        raise RateFetchError(f"{len(errors)} rate request(s) failed: {errors[0]}")
+    return payloads
+
+
+def fetch_rates(bases, dates, api_key: str, base_url: str, raw_dir: str, **kwargs) -> dict:
+    """Blocking wrapper around fetch_rates_async (same arguments)."""
+    return asyncio.run(fetch_rates_async(bases, dates, api_key, base_url, raw_dir, **kwargs))
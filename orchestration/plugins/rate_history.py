@@ -0,0 +1,133 @@
+"""
+rate_history.py
+---------------
+Point-in-time exchange-rate index built from the archived API payloads.
+
+All RAW_API_DIR/<YYYY-MM-DD>/rates.json files are compiled into one
+snapshot × currency float64 matrix (currency codes interned to column
+indices, snapshots ordered by `time_last_update_unix`). Conversions then look
+up the snapshot valid at each row's timestamp with np.searchsorted, so a
+transaction is converted with the rate published before its txn_time rather
+than with today's rate.
+
+Functions:
+    published_at(payload)
+    load_rate_history(raw_dir)
+"""
+
+import os
+import json
+import glob
+import logging
+
+import numpy as np
+import pandas as pd
+
+
+def published_at(payload: dict) -> int:
+    """Unix seconds a payload's rates were published (historical payloads only carry year/month/day)."""
+    if "time_last_update_unix" in payload:
+        return int(payload["time_last_update_unix"])
+    day = pd.Timestamp(year=payload["year"], month=payload["month"], day=payload["day"], tz="UTC")
+    return int(day.timestamp())
+
+
+class RateHistory:
+    """
+    Snapshot × currency matrix of USD-based rates.
+
+    Args:
+        updated_at (np.ndarray): sorted int64 unix seconds of each snapshot
+        currencies (list): currency code of each matrix column
+        matrix (np.ndarray): float64 rates, NaN where a snapshot lacks a currency
+    """
+
+    def __init__(self, updated_at: np.ndarray, currencies: list, matrix: np.ndarray):
+        self.updated_at = updated_at
+        self.currencies = list(currencies)
+        self.index = {c: i for i, c in enumerate(self.currencies)}
+        # Trailing NaN column serves unknown currencies (column index -1)
+        self.matrix = np.hstack([matrix, np.full((matrix.shape[0], 1), np.nan)])
+
+    def __len__(self) -> int:
+        return self.updated_at.size
+
+    @classmethod
+    def from_payloads(cls, payloads: list) -> "RateHistory":
+        snapshots = {}
+        for p in payloads:
+            snapshots[published_at(p)] = p["conversion_rates"]
+        if not snapshots:
+            raise ValueError("No rate snapshots to build a history from")
+
+        updated_at = np.array(sorted(snapshots), dtype=np.int64)
+        currencies = sorted({c for rates in snapshots.values() for c in rates})
+        col = {c: i for i, c in enumerate(currencies)}
+
+        matrix = np.full((updated_at.size, len(currencies)), np.nan)
+        for row, ts in enumerate(updated_at):
+            for cur, rate in snapshots[int(ts)].items():
+                matrix[row, col[cur]] = rate or np.nan  # zero rates are unusable
+        return cls(updated_at, currencies, matrix)
+
+    def snapshot_index(self, times: pd.Series) -> np.ndarray:
+        """
+        Row of the snapshot valid at each timestamp.
+
+        Times before the first snapshot use the earliest one; missing times use
+        the latest one (the behaviour of converting with current rates).
+        """
+        t = pd.DatetimeIndex(times)
+        if t.tz is not None:
+            t = t.tz_convert("UTC").tz_localize(None)
+        secs = t.to_numpy(dtype="datetime64[s]").view(np.int64)
+
+        idx = np.searchsorted(self.updated_at, secs, side="right") - 1
+        np.clip(idx, 0, None, out=idx)
+        idx[t.isna()] = self.updated_at.size - 1
+        return idx
+
+    def rates_as_of(self, currency: pd.Series, times: pd.Series) -> tuple:
+        """Return (per-row rate array, sorted list of currencies never seen in the history)."""
+        codes = pd.Categorical(currency.astype("string").str.upper())
+        categories = codes.categories.tolist()
+
+        cat_to_col = np.array([self.index.get(c, -1) for c in categories] + [-1], dtype=np.int64)
+        cols = cat_to_col[codes.codes]
+        rows = self.snapshot_index(times)
+
+        missing = sorted(c for c in categories if c not in self.index)
+        return self.matrix[rows, cols], missing
+
+    def convert(self, amount: pd.Series, currency: pd.Series, times: pd.Series) -> tuple:
+        """As-of counterpart of etl_pipeline.convert_to_usd."""
+        row_rates, missing = self.rates_as_of(currency, times)
+        values = np.divide(amount.to_numpy(dtype="float64", na_value=np.nan), row_rates)
+        amount_in_usd = pd.Series(pd.array(values, dtype="Float64"), index=amount.index)
+        amount_in_usd[np.isnan(row_rates)] = pd.NA
+        return amount_in_usd, missing
+
+
+def load_rate_history(raw_dir: str) -> RateHistory:
+    """
+    Compile every archived rates.json under raw_dir into a RateHistory.
+
+    Args:
+        raw_dir (str): Root of the dated archive, e.g. 'data/raw/api_currency'
+    """
+    payloads = []
+    for path in sorted(glob.glob(os.path.join(raw_dir, "*", "rates.json"))):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Skipping unreadable rates archive {path}: {e}")
+            continue
+        if data.get("result") != "success" or data.get("base_code", "USD") != "USD":
+            logging.warning(f"Skipping non-USD or failed rates archive {path}")
+            continue
+        payloads.append(data)
+
+    history = RateHistory.from_payloads(payloads)
+    logging.info(f"Loaded {len(history)} rate snapshots × {len(history.currencies)} currencies from {raw_dir}")
+    return history
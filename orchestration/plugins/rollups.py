@@ -0,0 +1,297 @@
+"""
+rollups.py
+----------
+Daily rollup tables maintained incrementally from the processing chunk loops.
+
+A DailyRollup is fed every chunk the pipeline writes and keeps per-chunk
+partial aggregates (one small groupby per chunk), so a run's rollup costs
+no extra pass over the data. At the end of the run the partials are folded
+into one row per (day, key) and written as a new slice of the table:
+
+    gs://<bucket>/rollups/<name>/<written_at>_<ingest_date>_<full|incremental>.parquet
+
+Runs never rewrite shared objects, so parallel backfills cannot race, and
+history is never recomputed. The slices are merged in write order
+(`merge_slices`):
+
+- a full run saw every input row of the days it covers, so its slice
+  replaces those days (re-runs and forced backfills do not double-count);
+- an incremental run saw only rows past its watermark, so its slice is
+  added to the stored days. Distinct counts of a day split across an
+  incremental boundary are therefore an upper bound.
+
+`read_rollup` returns the merged table; `compact_rollup` folds old slices
+into one full slice so reads stay a handful of objects.
+
+Rows without a parseable event time or key are not rolled up.
+
+Tables:
+    transactions_daily     day, currency  → transactions, amount_in_usd
+    clicks_by_page_daily   day, page_url  → clicks, distinct_users
+
+Classes:
+    DailyRollup(name, time_column, key_column, count, sums, distinct)
+
+Functions:
+    transactions_rollup()
+    clickstream_rollup()
+    rollup_root(bucket)
+    save_rollup(rollup, ingest_date, incremental, root, fs)
+    merge_slices(slices, key_column)
+    read_rollup(name, since, until, root, fs)
+    compact_rollup(name, root, fs, grace)
+    compact_rollups(root, fs)
+"""
+
+import io
+import logging
+from datetime import datetime
+
+import pandas as pd
+
+from clients import get_fs
+from run_log import DEFAULT_BUCKET
+
+# Fold pending distinct tuples once this many have accumulated
+DISTINCT_COMPACT_ROWS = 1_000_000
+# Slice modes: a full slice replaces the days it covers, an incremental one is added to them
+FULL, INCREMENTAL = "full", "incremental"
+# compact_rollup leaves slices younger than this alone, so a slice still being written is never skipped over
+COMPACT_GRACE = pd.Timedelta(hours=1)
+
+_SLICE_TS = "%Y%m%dT%H%M%S%fZ"
+
+
+class DailyRollup:
+    """
+    Per-day, per-key aggregates accumulated chunk by chunk.
+
+    Args:
+        name (str): Table name under the rollup root
+        time_column (str): UTC datetime column bucketed into days
+        key_column (str): Second grouping column, e.g. currency or page_url
+        count (str): Output column counting rows
+        sums (dict, optional): output column → input column to sum
+        distinct (dict, optional): output column → input column to count distinct values of
+        normalize_key (callable, optional): Maps the key column before grouping, e.g. to fold case
+    """
+
+    def __init__(self, name: str, time_column: str, key_column: str, count: str, sums: dict = None,
+                 distinct: dict = None, normalize_key=None):
+        self.name = name
+        self.time_column = time_column
+        self.key_column = key_column
+        self.count = count
+        self.sums = dict(sums or {})
+        self.distinct = dict(distinct or {})
+        self.normalize_key = normalize_key
+        self._partials = []
+        self._pending = {out: [] for out in self.distinct}
+        self._pending_rows = 0
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        if chunk.empty:
+            return
+        day = chunk[self.time_column].dt.floor("D").rename("day")
+        key = chunk[self.key_column]
+        if self.normalize_key is not None:
+            key = self.normalize_key(key)
+        key = key.rename("key")
+
+        aggregations = {self.count: (self.key_column, "size")}
+        aggregations.update({out: (column, "sum") for out, column in self.sums.items()})
+        self._partials.append(chunk.groupby([day, key], observed=True, sort=False).agg(**aggregations))
+
+        for out, column in self.distinct.items():
+            tuples = pd.DataFrame({"day": day, "key": key, "value": chunk[column]}).dropna().drop_duplicates()
+            self._pending[out].append(tuples)
+            self._pending_rows += len(tuples)
+        if self._pending_rows > DISTINCT_COMPACT_ROWS:
+            self._compact_distinct()
+
+    def _compact_distinct(self) -> None:
+        self._pending_rows = 0
+        for out, frames in self._pending.items():
+            if len(frames) > 1:
+                frames[:] = [pd.concat(frames, ignore_index=True).drop_duplicates()]
+            self._pending_rows += sum(len(f) for f in frames)
+
+    def result(self, ingest_date: str) -> pd.DataFrame:
+        """One row per (day, key) for this run, ready to store as its ingest_date slice."""
+        columns = ["ingest_date", "day", self.key_column, self.count, *self.sums, *self.distinct]
+        if not self._partials:
+            return pd.DataFrame(columns=columns)
+
+        df = pd.concat(self._partials).groupby(level=["day", "key"], observed=True).sum()
+        self._compact_distinct()
+        for out, frames in self._pending.items():
+            df[out] = pd.concat(frames).groupby(["day", "key"], observed=True).size()
+
+        df = df.reset_index()
+        df["ingest_date"] = ingest_date
+        df["day"] = df["day"].dt.strftime("%Y-%m-%d")
+        df = df.rename(columns={"key": self.key_column})
+        df[self.key_column] = df[self.key_column].astype(str)
+        df[self.count] = df[self.count].astype("int64")
+        for out in self.distinct:
+            df[out] = df[out].fillna(0).astype("int64")
+        return df[columns].sort_values(["day", self.key_column], ignore_index=True)
+
+
+def _currency_code(currency: pd.Series) -> pd.Series:
+    # Raw currency is mixed case ('eur', 'EUR'); convert_to_usd matches it upper-cased too
+    return currency.astype("string").str.upper()
+
+
+def transactions_rollup() -> DailyRollup:
+    return DailyRollup("transactions_daily", "txn_time", "currency", count="transactions",
+                       sums={"amount_in_usd": "amount_in_usd"}, normalize_key=_currency_code)
+
+
+def clickstream_rollup() -> DailyRollup:
+    return DailyRollup("clicks_by_page_daily", "click_time", "page_url", count="clicks",
+                       distinct={"distinct_users": "user_id"})
+
+
+def rollup_root(bucket: str = DEFAULT_BUCKET) -> str:
+    return f"gs://{bucket}/rollups"
+
+
+def _slice_dir(name: str, root: str) -> str:
+    return f"{root.split('://', 1)[-1]}/{name}"
+
+
+def _parse_slice_name(path: str) -> tuple:
+    """Return (written_at, ingest_date, mode) encoded in a slice object name."""
+    written_at, ingest_date, mode = path.rsplit("/", 1)[-1][:-len(".parquet")].split("_")
+    return pd.Timestamp(datetime.strptime(written_at, _SLICE_TS), tz="UTC"), ingest_date, mode
+
+
+def _list_slices(name: str, root: str, fs) -> list:
+    slice_dir = _slice_dir(name, root)
+    if not fs.exists(slice_dir):
+        return []
+    return sorted(p for p in fs.ls(slice_dir, detail=False) if p.endswith(".parquet"))  # write order
+
+
+def save_rollup(rollup: DailyRollup, ingest_date: str, incremental: bool = False, root: str = None,
+                fs=None) -> str:
+    """
+    Store a run's rollup as a new slice of its table.
+
+    Args:
+        rollup (DailyRollup): The run's accumulated rollup
+        ingest_date (str): Partition the run wrote
+        incremental (bool): The run only saw rows past its watermark, so its aggregates are added to the
+            stored days instead of replacing them
+        root (str, optional): Rollup root; defaults to rollup_root() of GCS_BUCKET
+        fs (fsspec.AbstractFileSystem, optional): Filesystem to write through
+
+    Returns:
+        str: path of the slice object
+    """
+    root = root or rollup_root()
+    fs = fs or get_fs(root)
+    df = rollup.result(ingest_date)
+    mode = INCREMENTAL if incremental else FULL
+    path = f"{_slice_dir(rollup.name, root)}/{datetime.utcnow().strftime(_SLICE_TS)}_{ingest_date}_{mode}.parquet"
+    with fs.open(path, "wb") as f:
+        df.to_parquet(f, index=False)
+    logging.info(f"Rollup {rollup.name} → {len(df)} {mode} rows for ingest_date={ingest_date} ({path})")
+    return path
+
+
+def merge_slices(slices: list, key_column: str) -> pd.DataFrame:
+    """
+    Fold slices, oldest first, into one row per (day, key).
+
+    A full slice replaces every day it covers; an incremental slice adds its
+    counts, sums and distinct counts to the days it covers.
+
+    Args:
+        slices (list): (mode, DataFrame) pairs in write order
+        key_column (str): The table's key column
+    """
+    table = None
+    for mode, df in slices:
+        df = df.drop(columns="ingest_date")
+        if table is None:
+            table = df
+        elif mode == FULL:
+            table = pd.concat([table[~table["day"].isin(df["day"].unique())], df], ignore_index=True)
+        else:
+            table = pd.concat([table, df], ignore_index=True).groupby(["day", key_column], as_index=False).sum()
+    if table is None:
+        return pd.DataFrame()
+    return table.sort_values(["day", key_column], ignore_index=True)
+
+
+def _read_slices(paths: list, fs) -> list:
+    blobs = fs.cat(paths)  # gcsfs fetches the batch concurrently
+    return [(_parse_slice_name(p)[2], pd.read_parquet(io.BytesIO(blobs[p]))) for p in paths]
+
+
+def read_rollup(name: str, since: str = None, until: str = None, root: str = None, fs=None) -> pd.DataFrame:
+    """
+    Read a rollup table, merging its stored slices (see merge_slices).
+
+    Args:
+        name (str): Table name, e.g. 'transactions_daily'
+        since (str, optional): First event day to include (ISO date)
+        until (str, optional): Last event day to include (ISO date)
+        root (str, optional): Rollup root; defaults to rollup_root() of GCS_BUCKET
+        fs (fsspec.AbstractFileSystem, optional): Filesystem to read through
+
+    Returns:
+        pd.DataFrame: one row per (day, key), ordered by day and key
+    """
+    root = root or rollup_root()
+    fs = fs or get_fs(root)
+    paths = _list_slices(name, root, fs)
+    if not paths:
+        return pd.DataFrame()
+
+    table = merge_slices(_read_slices(paths, fs), TABLES[name].key_column)
+    if since is not None:
+        table = table[table["day"] >= since]
+    if until is not None:
+        table = table[table["day"] <= until]
+    return table.reset_index(drop=True)
+
+
+def compact_rollup(name: str, root: str = None, fs=None, grace: pd.Timedelta = COMPACT_GRACE) -> int:
+    """
+    Fold slices older than `grace` into one full slice and delete them.
+
+    The compacted slice is named after the newest slice it folds, so it still
+    sorts before every slice left for the next pass. Call it from one place
+    only (the DAG's finalize task / the end of main), never from the runs.
+
+    Returns:
+        int: number of slices compacted
+    """
+    root = root or rollup_root()
+    fs = fs or get_fs(root)
+    cutoff = pd.Timestamp.now(tz="UTC") - grace
+    paths = [p for p in _list_slices(name, root, fs) if _parse_slice_name(p)[0] < cutoff]
+    if len(paths) < 2:
+        return 0
+
+    table = merge_slices(_read_slices(paths, fs), TABLES[name].key_column)
+    table.insert(0, "ingest_date", "compacted")
+    written_at = paths[-1].rsplit("/", 1)[-1].split("_", 1)[0]
+    compacted = f"{_slice_dir(name, root)}/{written_at}_compacted_{FULL}.parquet"
+    with fs.open(compacted, "wb") as f:
+        table.to_parquet(f, index=False)
+    fs.rm([p for p in paths if p != compacted])
+
+    logging.info(f"Compacted {len(paths)} {name} slices into {compacted} ({len(table)} rows)")
+    return len(paths)
+
+
+def compact_rollups(root: str = None, fs=None) -> int:
+    """Compact every rollup table."""
+    return sum(compact_rollup(name, root, fs) for name in TABLES)
+
+
+TABLES = {r.name: r for r in (transactions_rollup(), clickstream_rollup())}
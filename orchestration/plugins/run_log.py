@@ -0,0 +1,205 @@
+"""
+run_log.py
+----------
+Append-only, segmented run log with compaction and a query API.
+
+Object stores cannot append, so rewriting one run_log.csv per run costs
+O(history). Instead each run writes one small JSON segment object:
+
+    <root>/segments/<YYYYmmddTHHMMSSffffffZ>_<dataset>_<run_id>.json
+
+and `compact_run_log` periodically folds all segments into a single
+columnar file (<root>/compacted.parquet) and deletes them. Compaction
+rewrites compacted.parquet from what it read, so two overlapping passes can
+drop each other's segments: writers only ever add segments, and compaction
+runs from a single caller (etl_pipeline.compact_stores, at the end of main()
+and in the DAG's finalize task), never from log_run / log_metadata. `read_run_log`
+merges the compacted file with any fresh segments, pruning segments by the
+timestamp and dataset encoded in their names. Alerts use the same layout
+under their own root (`alerts_root`), one segment per alert.
+
+Functions:
+    run_log_root(bucket)
+    alerts_root(bucket)
+    write_run_segment(record, root, fs)
+    compact_run_log(root, fs)
+    maybe_compact_run_log(root, fs, every)
+    read_run_log(dataset, since, root, fs)
+"""
+
+import os
+import json
+import uuid
+import logging
+from datetime import datetime
+
+import pandas as pd
+
+from clients import get_fs
+
+DEFAULT_BUCKET = os.environ.get("GCS_BUCKET", "us-central1-storypoints-ai--aa8817f2-bucket")
+RUN_LOG_COLUMNS = ["dataset", "rows_in", "rows_out", "validation_status", "timestamp", "run_id"]
+# Fold segments into compacted.parquet once this many have accumulated
+COMPACT_EVERY = 50
+
+_SEGMENT_TS = "%Y%m%dT%H%M%S%fZ"
+
+
+def run_log_root(bucket: str = DEFAULT_BUCKET) -> str:
+    return f"gs://{bucket}/metadata/run_log"
+
+
+def alerts_root(bucket: str = DEFAULT_BUCKET) -> str:
+    return f"gs://{bucket}/alerts"
+
+
+def _strip_protocol(path: str) -> str:
+    return path.split("://", 1)[-1]
+
+
+def _parse_segment_name(path: str) -> tuple:
+    """Return (timestamp, dataset) encoded in a segment object name."""
+    name = path.rsplit("/", 1)[-1][:-len(".json")]
+    ts, rest = name.split("_", 1)
+    dataset = rest.rsplit("_", 1)[0]
+    return pd.Timestamp(datetime.strptime(ts, _SEGMENT_TS), tz="UTC"), dataset
+
+
+def _list_segments(root: str, fs) -> list:
+    seg_dir = f"{_strip_protocol(root)}/segments"
+    if not fs.exists(seg_dir):
+        return []
+    return sorted(p for p in fs.ls(seg_dir, detail=False) if p.endswith(".json"))
+
+
+def write_run_segment(record: dict, root: str = None, fs=None) -> str:
+    """
+    Write one run's metadata as its own segment object.
+
+    Args:
+        record (dict): At least dataset, rows_in, rows_out, validation_status; extra keys become extra columns
+        root (str, optional): Run-log root; defaults to run_log_root() of GCS_BUCKET
+        fs (fsspec.AbstractFileSystem, optional): Filesystem to write through
+    """
+    root = root or run_log_root()
+    fs = fs or get_fs(root)
+    now = datetime.utcnow()
+    record = dict(record)
+    record.setdefault("timestamp", now.isoformat())
+    record.setdefault("run_id", uuid.uuid4().hex[:12])
+
+    path = f"{_strip_protocol(root)}/segments/{now.strftime(_SEGMENT_TS)}_{record['dataset']}_{record['run_id']}.json"
+    fs.pipe(path, json.dumps(record, default=str).encode("utf-8"))
+    return path
+
+
+def _read_segments(paths: list, fs) -> pd.DataFrame:
+    if not paths:
+        return pd.DataFrame(columns=RUN_LOG_COLUMNS)
+    blobs = fs.cat(paths)  # gcsfs fetches the batch concurrently
+    return pd.DataFrame([json.loads(blobs[p]) for p in paths])
+
+
+def _to_utc(ts) -> pd.Timestamp:
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    for col in RUN_LOG_COLUMNS:
+        if col not in df.columns:
+            df[col] = pd.NA
+    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True, format="ISO8601")
+    return df
+
+
+def compact_run_log(root: str = None, fs=None) -> int:
+    """
+    Fold every current segment into compacted.parquet and delete those segments.
+
+    Segments written while compaction runs are left for the next pass.
+
+    Returns:
+        int: number of segments compacted
+    """
+    root = root or run_log_root()
+    fs = fs or get_fs(root)
+    segments = _list_segments(root, fs)
+    if not segments:
+        return 0
+
+    compacted_path = f"{_strip_protocol(root)}/compacted.parquet"
+    frames = []
+    if fs.exists(compacted_path):
+        with fs.open(compacted_path, "rb") as f:
+            frames.append(pd.read_parquet(f))
+    frames.append(_normalize(_read_segments(segments, fs)))
+
+    df = pd.concat(frames, ignore_index=True)
+    df = df.drop_duplicates("run_id", keep="last").sort_values("timestamp", kind="stable")
+
+    with fs.open(compacted_path, "wb") as f:  # object replaced atomically on close
+        df.to_parquet(f, index=False)
+    fs.rm(segments)
+
+    logging.info(f"Compacted {len(segments)} run-log segments into {compacted_path} ({len(df)} rows)")
+    return len(segments)
+
+
+def maybe_compact_run_log(root: str = None, fs=None, every: int = COMPACT_EVERY) -> int:
+    """Compact once at least `every` segments are waiting."""
+    root = root or run_log_root()
+    fs = fs or get_fs(root)
+    if len(_list_segments(root, fs)) < every:
+        return 0
+    return compact_run_log(root, fs)
+
+
+def read_run_log(dataset: str = None, since=None, root: str = None, fs=None) -> pd.DataFrame:
+    """
+    Read run metadata from the compacted file plus fresh segments.
+
+    Args:
+        dataset (str, optional): Only runs of this dataset
+        since (str | datetime, optional): Only runs at or after this UTC time
+        root (str, optional): Run-log root; defaults to run_log_root() of GCS_BUCKET
+        fs (fsspec.AbstractFileSystem, optional): Filesystem to read through
+
+    Returns:
+        pd.DataFrame: one row per run, ordered by timestamp
+    """
+    root = root or run_log_root()
+    fs = fs or get_fs(root)
+    since = _to_utc(since) if since is not None else None
+
+    frames = []
+    compacted_path = f"{_strip_protocol(root)}/compacted.parquet"
+    if fs.exists(compacted_path):
+        filters = []
+        if dataset is not None:
+            filters.append(("dataset", "==", dataset))
+        if since is not None:
+            filters.append(("timestamp", ">=", since))
+        with fs.open(compacted_path, "rb") as f:
+            frames.append(pd.read_parquet(f, filters=filters or None))
+
+    # Prune segments by the timestamp/dataset in their names before fetching any
+    wanted = []
+    for path in _list_segments(root, fs):
+        ts, seg_dataset = _parse_segment_name(path)
+        if dataset is not None and seg_dataset != dataset:
+            continue
+        if since is not None and ts < since:
+            continue
+        wanted.append(path)
+    if wanted:
+        frames.append(_normalize(_read_segments(wanted, fs)))
+
+    if not frames:
+        return _normalize(pd.DataFrame(columns=RUN_LOG_COLUMNS))
+
+    df = pd.concat(frames, ignore_index=True)
+    df = df.drop_duplicates("run_id", keep="last")
+    if since is not None:
+        df = df[df["timestamp"] >= since]
+    return df.sort_values("timestamp", kind="stable").reset_index(drop=True)
@@ -0,0 +1,106 @@
+"""
+schemas.py
+----------
+Declared schemas for the raw input datasets.
+
+Each schema lists the standardized (snake_case) column names of the real
+inputs and their pandas dtypes: nullable Int64 for the numeric user_id,
+string for the alphanumeric ids (session_id "s_...", txn_id), category
+for low-cardinality strings (currency, page_url, device, location),
+float64 for amounts and plain strings for raw timestamps (parsed later by
+timestamps.py). The raw header is read once per file and mapped to
+snake_case, which drives read_csv's `dtype`, so declared columns skip type
+inference and per-chunk memory drops enough that CHUNK_SIZE can be raised
+well beyond 50,000. Columns the schema does not declare are still read
+(with inferred dtypes) and logged, never dropped from the output.
+
+Functions:
+    snake_case(name)
+    read_header(src)
+"""
+
+import re
+
+import pandas as pd
+
+
+def snake_case(name) -> str:
+    """Standardize one column name (same rule as etl_pipeline.standardize_columns)."""
+    return re.sub(r"__+", "_", re.sub(r"[^\w]+", "_", str(name).strip())).lower()
+
+
+def read_header(src) -> list:
+    """Read the raw header of an open, seekable CSV file and rewind it."""
+    columns = pd.read_csv(src, nrows=0).columns.tolist()
+    src.seek(0)
+    return columns
+
+
+class DatasetSchema:
+    """
+    Declared columns of one dataset.
+
+    Args:
+        name (str): Dataset name
+        columns (dict): snake_case column name → pandas dtype
+        timestamp_column (str): Column holding the event time
+        dictionary_columns (list): Columns to dictionary-encode in Parquet output
+    """
+
+    def __init__(self, name: str, columns: dict, timestamp_column: str, dictionary_columns: list):
+        self.name = name
+        self.columns = dict(columns)
+        self.timestamp_column = timestamp_column
+        self.dictionary_columns = list(dictionary_columns)
+
+    def header_mapping(self, raw_columns: list) -> dict:
+        """Map every raw header name to its snake_case name."""
+        return {raw: snake_case(raw) for raw in raw_columns}
+
+    def read_options(self, raw_columns: list) -> tuple:
+        """
+        Build read_csv options for a file with the given raw header.
+
+        Returns:
+            tuple: ({"dtype": {...}} for the declared columns, raw → snake_case mapping)
+        """
+        mapping = self.header_mapping(raw_columns)
+        options = {"dtype": {raw: self.columns[std] for raw, std in mapping.items() if std in self.columns}}
+        return options, mapping
+
+    def undeclared_columns(self, raw_columns: list) -> list:
+        return [std for std in self.header_mapping(raw_columns).values() if std not in self.columns]
+
+    def missing_columns(self, raw_columns: list) -> list:
+        found = set(self.header_mapping(raw_columns).values())
+        return [c for c in self.columns if c not in found]
+
+
+CLICKSTREAM_SCHEMA = DatasetSchema(
+    "clickstream",
+    {
+        "user_id": "Int64",
+        "session_id": "string",
+        "page_url": "category",
+        "click_time": "str",
+        "device": "category",
+        "location": "category",
+    },
+    timestamp_column="click_time",
+    dictionary_columns=["page_url", "device", "location"],
+)
+
+TRANSACTIONS_SCHEMA = DatasetSchema(
+    "transactions",
+    {
+        "txn_id": "string",
+        "user_id": "Int64",
+        "amount": "float64",
+        "currency": "category",
+        "txn_time": "str",
+    },
+    timestamp_column="txn_time",
+    dictionary_columns=["currency"],
+)
+
+SCHEMAS = {s.name: s for s in (CLICKSTREAM_SCHEMA, TRANSACTIONS_SCHEMA)}
@@ -0,0 +1,104 @@
+"""
+sessions.py
+-----------
+Per-session aggregates over cleaned clickstream rows.
+
+Clicks are sorted once by (user_id, session_id, click_time); session ids
+(strings such as "s_001") are replaced by their sorted factorize codes so
+the sort runs on integers. Session boundaries are then wherever the
+(user_id, session code) pair changes, and every aggregate is read off the
+sorted arrays at those boundaries. No groupby over Python objects and no
+per-row Python are involved:
+
+    user_id, session_id   the session key
+    session_start/_end    first and last click (UTC)
+    duration_s            session_end - session_start in seconds
+    page_views            clicks in the session
+    distinct_pages        distinct page_url values in the session
+    entry_page/exit_page  page_url of the first and last click
+
+Clicks without a user_id, session_id or parseable click_time cannot be
+placed in a session and are dropped (counted in `dropped`).
+
+Functions:
+    sessionize(clicks)
+"""
+
+import numpy as np
+import pandas as pd
+
+SESSION_KEY = ["user_id", "session_id"]
+CLICK_COLUMNS = SESSION_KEY + ["page_url", "click_time"]
+
+
+def sessionize(clicks: pd.DataFrame) -> tuple:
+    """
+    Aggregate cleaned clicks into one row per (user_id, session_id).
+
+    Args:
+        clicks (pd.DataFrame): Rows with user_id, session_id, page_url and a datetime click_time
+
+    Returns:
+        tuple: (sessions DataFrame sorted by user_id/session_id/session_start, clicks dropped)
+    """
+    placed = clicks[CLICK_COLUMNS].dropna(subset=SESSION_KEY + ["click_time"])
+    dropped = len(clicks) - len(placed)
+    if placed.empty:
+        return _empty_sessions(clicks["session_id"].dtype), dropped
+
+    user = placed["user_id"].to_numpy(dtype=np.int64)
+    session_ids = placed["session_id"].array
+    session, _ = pd.factorize(session_ids, sort=True)  # codes follow session_id order, whatever its dtype
+    click_time = pd.to_datetime(placed["click_time"], utc=True).dt.tz_convert(None).to_numpy()
+    pages = placed["page_url"].astype("category")
+    page_codes = pages.cat.codes.to_numpy(dtype=np.int64)  # -1 for a missing page_url
+
+    # The one sort: lexsort orders by its last key first
+    order = np.lexsort((click_time, session, user))
+    user, session, click_time, page_codes = user[order], session[order], click_time[order], page_codes[order]
+
+    boundary = np.empty(len(user), dtype=bool)
+    boundary[0] = True
+    np.not_equal(user[1:], user[:-1], out=boundary[1:])
+    boundary[1:] |= session[1:] != session[:-1]
+    starts = np.flatnonzero(boundary)
+    ends = np.append(starts[1:], len(user)) - 1
+    page_views = ends - starts + 1
+
+    # Distinct (session, page) pairs, counted per session; code 0 (missing page_url) is not a page
+    session_index = np.repeat(np.arange(len(starts)), page_views)
+    n_pages = len(pages.cat.categories) + 1
+    pairs = np.unique(session_index * n_pages + page_codes + 1)
+    pairs = pairs[pairs % n_pages > 0]
+    distinct = np.bincount(pairs // n_pages, minlength=len(starts))
+
+    def page_at(index):
+        return pd.Categorical.from_codes(page_codes[index], pages.cat.categories)
+
+    start_time, end_time = click_time[starts], click_time[ends]
+    sessions = pd.DataFrame({
+        "user_id": pd.array(user[starts], dtype="Int64"),
+        "session_id": session_ids.take(order[starts]),  # the input's session_id dtype
+        "session_start": pd.DatetimeIndex(start_time).tz_localize("UTC"),
+        "session_end": pd.DatetimeIndex(end_time).tz_localize("UTC"),
+        "duration_s": (end_time - start_time) / np.timedelta64(1, "s"),
+        "page_views": page_views,
+        "distinct_pages": distinct.astype(np.int64),
+        "entry_page": page_at(starts),
+        "exit_page": page_at(ends),
+    })
+    return sessions, dropped
+
+
+def _empty_sessions(session_dtype) -> pd.DataFrame:
+    return pd.DataFrame({
+        "user_id": pd.array([], dtype="Int64"),
+        "session_id": pd.array([], dtype=session_dtype),
+        "session_start": pd.DatetimeIndex([], tz="UTC"),
+        "session_end": pd.DatetimeIndex([], tz="UTC"),
+        "duration_s": np.array([], dtype=np.float64),
+        "page_views": np.array([], dtype=np.int64),
+        "distinct_pages": np.array([], dtype=np.int64),
+        "entry_page": pd.Categorical([]),
+        "exit_page": pd.Categorical([]),
+    })
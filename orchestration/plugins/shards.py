@@ -0,0 +1,107 @@
+"""
+shards.py
+---------
+Split one input into independently processable shards for fan-out.
+
+A shard is a small, JSON-serializable dict (it travels through XCom):
+
+    {"index": 3, "source": "gs://.../clickstream.csv", "start": 1048576, "end": 2097152}
+
+A single CSV is cut into byte ranges whose boundaries are moved forward to
+the next newline, so every shard holds whole rows; `start` of the first
+shard skips the header and `end` None means end of file. A directory or glob
+source becomes one whole-file shard per matching file. Byte-range sharding
+assumes no quoted field contains a newline (true of the raw inputs here).
+
+Each shard's transformed rows are written as a Parquet part; `read_parts`
+streams the parts back, in shard order, for the merge step.
+
+Classes:
+    ByteRange(raw, length)
+
+Functions:
+    plan_shards(fs, source, shards, min_shard_bytes)
+    read_parts(parts, chunk_size, fs)
+"""
+
+import io
+
+# Don't cut a file into shards smaller than this
+MIN_SHARD_BYTES = 64 * 1024 * 1024
+
+
+class ByteRange(io.RawIOBase):
+    """Read-only view of the next `length` bytes of an open binary file."""
+
+    def __init__(self, raw, length: int):
+        self.raw = raw
+        self.remaining = length
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        n = min(len(buffer), self.remaining)
+        if n <= 0:
+            return 0
+        data = self.raw.read(n)
+        buffer[:len(data)] = data
+        self.remaining -= len(data)
+        return len(data)
+
+
+def _is_glob(source: str) -> bool:
+    return any(c in source for c in "*?[")
+
+
+def plan_shards(fs, source: str, shards: int, min_shard_bytes: int = MIN_SHARD_BYTES) -> list:
+    """
+    Plan up to `shards` shards of source.
+
+    Args:
+        fs (fsspec.AbstractFileSystem): Filesystem holding the input
+        source (str): CSV file, directory or glob
+        shards (int): Requested shard count for a single file
+        min_shard_bytes (int): Lower bound on a byte-range shard's size
+    """
+    if _is_glob(source) or fs.isdir(source):
+        files = sorted(fs.glob(source) if _is_glob(source) else fs.find(source))
+        protocol = source.split("://", 1)[0] + "://" if "://" in source else ""
+        return [{"index": i, "source": protocol + f.split("://", 1)[-1], "start": 0, "end": None}
+                for i, f in enumerate(files)]
+
+    size = fs.size(source)
+    with fs.open(source, "rb") as f:
+        header_end = len(f.readline())
+        body = size - header_end
+        n = max(1, min(shards, body // max(min_shard_bytes, 1)))
+
+        cuts = [header_end]
+        for k in range(1, n):
+            f.seek(header_end + body * k // n - 1)
+            boundary = f.tell() + len(f.readline())  # first row starting at or after the cut
+            if cuts[-1] < boundary < size:
+                cuts.append(boundary)
+
+    ends = cuts[1:] + [None]
+    return [{"index": i, "source": source, "start": start, "end": end}
+            for i, (start, end) in enumerate(zip(cuts, ends))]
+
+
+def read_parts(parts: list, chunk_size: int, fs):
+    """
+    Yield (chunk, stats) from shard Parquet parts in shard order.
+
+    The first chunk of each part carries the shard's own stats (nat, missing),
+    so summing stats over the stream rolls them up; later chunks carry zeros.
+    """
+    import pyarrow.parquet as pq
+
+    for part in sorted(parts, key=lambda p: p["index"]):
+        if not part["rows"]:
+            continue
+        stats = {"nat": part.get("nat", 0), "missing": part.get("missing", [])}
+        with fs.open(part["part"], "rb") as f:
+            for batch in pq.ParquetFile(f).iter_batches(batch_size=chunk_size):
+                yield batch.to_pandas(), stats
+                stats = {"nat": 0, "missing": []}
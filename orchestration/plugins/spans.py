@@ -0,0 +1,118 @@
+"""
+spans.py
+--------
+Lightweight per-stage instrumentation for pipeline runs.
+
+A SpanRecorder accumulates, per stage name, the wall time, process CPU
+time, growth of the process's peak RSS, bytes moved and rows handled.
+Stages that run once per chunk (dedup, write, ...) enter the same span
+repeatedly and their measurements add up. `columns()` flattens the result
+into run-log columns:
+
+    <stage>_wall_s, <stage>_cpu_s, <stage>_rss_delta_mb, <stage>_bytes, <stage>_rows_per_s
+
+Set ETL_SPANS=0 (or SpanRecorder(enabled=False)) to disable it: span()
+then returns a shared no-op context manager and nothing is measured.
+
+Classes:
+    SpanRecorder(enabled)
+"""
+
+import os
+import time
+import logging
+import resource
+from contextlib import contextmanager, nullcontext
+
+# Default for new recorders; ETL_SPANS=0 turns instrumentation off
+ENABLED = os.environ.get("ETL_SPANS", "1") != "0"
+
+_NOOP = nullcontext()
+
+
+def _peak_rss_kb() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB on Linux
+
+
+class _Span:
+    __slots__ = ("wall", "cpu", "rss_kb", "bytes", "rows")
+
+    def __init__(self):
+        self.wall = self.cpu = 0.0
+        self.rss_kb = self.bytes = self.rows = 0
+
+
+class SpanRecorder:
+    """
+    Accumulate per-stage measurements for one dataset run.
+
+    Args:
+        enabled (bool, optional): Measure anything at all (default: ETL_SPANS environment toggle)
+    """
+
+    def __init__(self, enabled: bool = None):
+        self.enabled = ENABLED if enabled is None else enabled
+        self.spans = {}
+
+    def _get(self, name: str) -> _Span:
+        span = self.spans.get(name)
+        if span is None:
+            span = self.spans[name] = _Span()
+        return span
+
+    @contextmanager
+    def _measure(self, name: str, rows: int, nbytes: int):
+        wall, cpu, rss = time.perf_counter(), time.process_time(), _peak_rss_kb()
+        try:
+            yield
+        finally:
+            span = self._get(name)
+            span.wall += time.perf_counter() - wall
+            span.cpu += time.process_time() - cpu
+            span.rss_kb += _peak_rss_kb() - rss
+            span.rows += rows
+            span.bytes += nbytes
+
+    def span(self, name: str, rows: int = 0, nbytes: int = 0):
+        """Context manager measuring one (possibly repeated) stage."""
+        if not self.enabled:
+            return _NOOP
+        return self._measure(name, rows, nbytes)
+
+    def add(self, name: str, rows: int = 0, nbytes: int = 0) -> None:
+        """Credit rows/bytes to a stage when they are only known after it ran."""
+        if self.enabled:
+            span = self._get(name)
+            span.rows += rows
+            span.bytes += nbytes
+
+    def timed_iter(self, name: str, iterable):
+        """Yield from iterable, measuring the time spent producing each item under `name`."""
+        if not self.enabled:
+            yield from iterable
+            return
+        iterator = iter(iterable)
+        while True:
+            with self._measure(name, 0, 0):
+                item = next(iterator, _NOOP)
+            if item is _NOOP:
+                return
+            yield item
+
+    def columns(self) -> dict:
+        """Flat run-log columns for every recorded stage ({} when disabled)."""
+        out = {}
+        for name, s in self.spans.items():
+            out[f"{name}_wall_s"] = round(s.wall, 4)
+            out[f"{name}_cpu_s"] = round(s.cpu, 4)
+            out[f"{name}_rss_delta_mb"] = round(s.rss_kb / 1024, 1)
+            if s.bytes:
+                out[f"{name}_bytes"] = s.bytes
+            if s.rows:
+                out[f"{name}_rows_per_s"] = round(s.rows / s.wall) if s.wall > 0 else None
+        return out
+
+    def log_summary(self, label: str) -> None:
+        if self.spans:
+            logging.info(f"{label} stages: " + ", ".join(
+                f"{name}={s.wall:.2f}s (cpu {s.cpu:.2f}s)" for name, s in self.spans.items()))
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+from attribution import PartitionSpool, attribute, user_partitions
+
+
+def _utc(*times):
+    return pd.to_datetime(list(times), utc=True)
+
+
+CLICKS = pd.DataFrame({
+    "user_id": [1, 1, 2],
+    "session_id": pd.array(["s1", "s2", "s3"], dtype="string"),
+    "page_url": ["/a", "/b", "/c"],
+    "click_time": _utc("2025-09-01 10:00", "2025-09-01 11:00", "2025-09-01 09:00"),
+})
+
+
+def test_last_earlier_click_of_the_same_user():
+    txns = pd.DataFrame({
+        "txn_id": ["t1", "t2", "t3", "t4", "t5"],
+        "user_id": pd.array([1, 1, 2, 3, None], dtype="Int64"),
+        "txn_time": _utc("2025-09-01 10:30", "2025-09-01 11:00", "2025-09-01 08:00", "2025-09-01 12:00",
+                         "2025-09-01 12:00"),
+    })
+    out = attribute(txns, CLICKS)
+
+    assert out["txn_id"].tolist() == ["t1", "t2", "t3", "t4", "t5"]  # same rows, same order
+    assert out["attributed_session_id"].tolist()[:2] == ["s1", "s2"]  # a click at txn_time counts
+    assert out["attributed_session_id"].isna().tolist() == [False, False, True, True, True]
+    assert out["attributed_page_url"].tolist()[:2] == ["/a", "/b"]
+    assert out["seconds_since_click"].tolist()[:2] == [1800.0, 0.0]
+
+
+def test_lookback_limits_the_credited_click():
+    txns = pd.DataFrame({"user_id": [1], "txn_time": _utc("2025-09-01 13:00")})
+    assert attribute(txns, CLICKS, lookback=pd.Timedelta(hours=1))["attributed_session_id"].isna().all()
+    assert attribute(txns, CLICKS, lookback=pd.Timedelta(hours=3))["attributed_session_id"].tolist() == ["s2"]
+
+
+def test_no_clicks_keeps_the_schema():
+    txns = pd.DataFrame({"user_id": [1], "txn_time": _utc("2025-09-01 13:00")})
+    out = attribute(txns, None, session_dtype="string")
+    assert out["attributed_session_id"].dtype == "string"
+    assert out["attributed_click_time"].isna().all()
+
+
+def test_partitioned_join_matches_one_join(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 2000
+    clicks = pd.DataFrame({
+        "user_id": rng.integers(0, 100, n),
+        "session_id": pd.array([f"s{i}" for i in rng.integers(0, 500, n)], dtype="string"),
+        "page_url": rng.choice(["/a", "/b", "/c"], n),
+        "click_time": pd.Timestamp("2025-09-01", tz="UTC") + pd.to_timedelta(rng.integers(0, 86400, n), unit="s"),
+    })
+    txns = pd.DataFrame({
+        "txn_id": np.arange(n),
+        "user_id": rng.integers(0, 100, n),
+        "txn_time": pd.Timestamp("2025-09-01", tz="UTC") + pd.to_timedelta(rng.integers(0, 86400, n), unit="s"),
+    })
+    expected = attribute(txns, clicks).set_index("txn_id").sort_index()
+
+    partitions = 4
+    assert set(user_partitions(clicks["user_id"], partitions)) <= set(range(partitions))
+    with PartitionSpool(str(tmp_path), "clicks", partitions, ["page_url"]) as click_spool, \
+            PartitionSpool(str(tmp_path), "txns", partitions) as txn_spool:
+        for start in range(0, n, 500):
+            click_spool.write(clicks.iloc[start:start + 500])
+            txn_spool.write(txns.iloc[start:start + 500])
+    parts = [attribute(txn_spool.read(p), click_spool.read(p), session_dtype="string")
+             for p in range(partitions) if txn_spool.read(p) is not None]
+    got = pd.concat(parts).set_index("txn_id").sort_index()
+
+    assert len(got) == n
+    pd.testing.assert_series_equal(got["attributed_session_id"], expected["attributed_session_id"])
+    pd.testing.assert_series_equal(got["attributed_click_time"], expected["attributed_click_time"])
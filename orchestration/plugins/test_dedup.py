@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from dedup import StreamingDeduplicator
+
+
+def test_drops_duplicates_within_and_across_chunks():
+    dedup = StreamingDeduplicator()
+    first = dedup.drop_duplicates(pd.DataFrame({"a": [1, 2, 2, 3], "b": ["x", "y", "y", "z"]}))
+    second = dedup.drop_duplicates(pd.DataFrame({"a": [3, 4, 1], "b": ["z", "w", "q"]}))
+
+    assert first.to_dict("list") == {"a": [1, 2, 3], "b": ["x", "y", "z"]}
+    assert second.to_dict("list") == {"a": [4, 1], "b": ["w", "q"]}
+    assert (dedup.rows_in, dedup.rows_out, dedup.deduped) == (7, 5, 2)
+
+
+def test_key_columns_only():
+    dedup = StreamingDeduplicator(key=["id"])
+    out = dedup.drop_duplicates(pd.DataFrame({"id": [1, 1, 2], "v": [10, 20, 30]}))
+    assert out["v"].tolist() == [10, 30]
+
+
+def test_runs_merge_like_a_binary_counter():
+    dedup = StreamingDeduplicator()
+    for start in range(0, 1000, 10):
+        dedup.drop_duplicates(pd.DataFrame({"a": np.arange(start, start + 10)}))
+
+    # Each run is more than twice the size of the next, so a few runs hold every hash
+    sizes = [run.size for run in dedup._runs]
+    assert len(dedup) == 1000
+    assert all(a > 2 * b for a, b in zip(sizes, sizes[1:]))
+    assert len(sizes) <= 10
+    assert all((run[1:] > run[:-1]).all() for run in dedup._runs)
+
+    # Every earlier row is still found after the merges
+    again = dedup.drop_duplicates(pd.DataFrame({"a": np.arange(0, 1000, 7)}))
+    assert again.empty
+
+
+def test_empty_chunk():
+    dedup = StreamingDeduplicator()
+    assert dedup.drop_duplicates(pd.DataFrame({"a": []})).empty
+    assert dedup.rows_in == 0
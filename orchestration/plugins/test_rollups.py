@@ -0,0 +1,70 @@
+import fsspec
+import pandas as pd
+
+from rollups import FULL, INCREMENTAL, clickstream_rollup, transactions_rollup, merge_slices, read_rollup, \
+    save_rollup
+
+
+def _slice(rows):
+    return pd.DataFrame(rows, columns=["ingest_date", "day", "currency", "transactions", "amount_in_usd"])
+
+
+def test_full_slice_replaces_its_days_and_incremental_adds():
+    merged = merge_slices([
+        (FULL, _slice([("d1", "2025-09-01", "USD", 5, 50.0), ("d1", "2025-09-02", "USD", 2, 20.0)])),
+        (INCREMENTAL, _slice([("d2", "2025-09-02", "USD", 1, 10.0), ("d2", "2025-09-02", "EUR", 3, 9.0)])),
+        (FULL, _slice([("d3", "2025-09-01", "USD", 4, 40.0)])),  # a re-run of 09-01 does not double-count
+    ], "currency")
+
+    assert merged.to_dict("records") == [
+        {"day": "2025-09-01", "currency": "USD", "transactions": 4, "amount_in_usd": 40.0},
+        {"day": "2025-09-02", "currency": "EUR", "transactions": 3, "amount_in_usd": 9.0},
+        {"day": "2025-09-02", "currency": "USD", "transactions": 3, "amount_in_usd": 30.0},
+    ]
+
+
+def test_chunked_rollup_matches_one_groupby():
+    txns = pd.DataFrame({
+        "txn_time": pd.to_datetime(["2025-09-01 01:00", "2025-09-01 23:00", "2025-09-02 00:30", "2025-09-01 05:00"],
+                                   utc=True),
+        "currency": ["usd", "USD", "eur", "EUR"],
+        "amount_in_usd": [1.0, 2.0, 3.0, 4.0],
+    })
+    rollup = transactions_rollup()
+    rollup.update(txns.iloc[:2])
+    rollup.update(txns.iloc[2:])
+
+    result = rollup.result("2025-09-02")
+    assert result[["day", "currency", "transactions", "amount_in_usd"]].to_dict("records") == [
+        {"day": "2025-09-01", "currency": "EUR", "transactions": 1, "amount_in_usd": 4.0},
+        {"day": "2025-09-01", "currency": "USD", "transactions": 2, "amount_in_usd": 3.0},
+        {"day": "2025-09-02", "currency": "EUR", "transactions": 1, "amount_in_usd": 3.0},
+    ]
+
+
+def test_distinct_users_across_chunks():
+    clicks = pd.DataFrame({
+        "click_time": pd.to_datetime(["2025-09-01 01:00"] * 4, utc=True),
+        "page_url": ["/a", "/a", "/a", "/b"],
+        "user_id": [1, 2, 1, 1],
+    })
+    rollup = clickstream_rollup()
+    for i in range(len(clicks)):
+        rollup.update(clicks.iloc[[i]])
+    result = rollup.result("2025-09-01").set_index("page_url")
+    assert result.loc["/a", "clicks"] == 3 and result.loc["/a", "distinct_users"] == 2
+    assert result.loc["/b", "clicks"] == 1 and result.loc["/b", "distinct_users"] == 1
+
+
+def test_saved_slices_merge_on_read(tmp_path):
+    fs = fsspec.filesystem("file", auto_mkdir=True)
+    root = str(tmp_path)
+    txns = pd.DataFrame({"txn_time": pd.to_datetime(["2025-09-01 01:00"], utc=True), "currency": ["USD"],
+                         "amount_in_usd": [5.0]})
+    for incremental in (False, False, True):
+        rollup = transactions_rollup()
+        rollup.update(txns)
+        save_rollup(rollup, "2025-09-01", incremental, root, fs)
+
+    table = read_rollup("transactions_daily", root=root, fs=fs)
+    assert table[["transactions", "amount_in_usd"]].to_dict("records") == [{"transactions": 2, "amount_in_usd": 10.0}]
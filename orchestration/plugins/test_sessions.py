@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from sessions import sessionize
+
+
+def _clicks(data):
+    df = pd.DataFrame(data, columns=["user_id", "session_id", "page_url", "click_time"])
+    df["session_id"] = df["session_id"].astype("string")
+    df["click_time"] = pd.to_datetime(df["click_time"], utc=True)
+    return df
+
+
+def test_aggregates_per_session():
+    clicks = _clicks([
+        (1, "s2", "/c", "2025-09-01 10:05:00"),
+        (1, "s1", "/b", "2025-09-01 09:01:00"),
+        (1, "s1", "/a", "2025-09-01 09:00:00"),
+        (1, "s1", "/a", "2025-09-01 09:03:30"),
+        (2, "s1", "/a", "2025-09-01 08:00:00"),  # same session id, different user
+    ])
+    sessions, dropped = sessionize(clicks)
+
+    assert dropped == 0
+    assert sessions[["user_id", "session_id"]].values.tolist() == [[1, "s1"], [1, "s2"], [2, "s1"]]
+    first = sessions.iloc[0]
+    assert first["session_start"] == pd.Timestamp("2025-09-01 09:00", tz="UTC")
+    assert first["duration_s"] == 210.0
+    assert first["page_views"] == 3 and first["distinct_pages"] == 2
+    assert (first["entry_page"], first["exit_page"]) == ("/a", "/a")
+    assert sessions["page_views"].tolist() == [3, 1, 1]
+    assert sessions["session_id"].dtype == "string"
+
+
+def test_unplaceable_clicks_are_dropped():
+    clicks = _clicks([
+        (1, "s1", "/a", "2025-09-01 09:00:00"),
+        (None, "s1", "/a", "2025-09-01 09:00:00"),
+        (1, None, "/a", "2025-09-01 09:00:00"),
+        (1, "s1", "/b", None),
+        (1, "s1", None, "2025-09-01 09:01:00"),  # a missing page still counts as a view
+    ])
+    sessions, dropped = sessionize(clicks)
+    assert dropped == 3
+    assert sessions["page_views"].tolist() == [2]
+    assert sessions["distinct_pages"].tolist() == [1]
+
+
+def test_matches_groupby():
+    rng = np.random.default_rng(1)
+    n = 5000
+    clicks = _clicks({
+        "user_id": rng.integers(0, 50, n),
+        "session_id": [f"s{i}" for i in rng.integers(0, 20, n)],
+        "page_url": rng.choice(["/a", "/b", "/c", "/d"], n),
+        "click_time": pd.Timestamp("2025-09-01") + pd.to_timedelta(rng.integers(0, 86400, n), unit="s"),
+    })
+    sessions, _ = sessionize(clicks)
+
+    ordered = clicks.sort_values("click_time", kind="stable").groupby(["user_id", "session_id"])
+    expected = ordered.agg(page_views=("page_url", "size"), distinct_pages=("page_url", "nunique"),
+                           session_start=("click_time", "min"), session_end=("click_time", "max"))
+    got = sessions.set_index(["user_id", "session_id"])
+    assert len(got) == len(expected)
+    for column in expected.columns:
+        assert (got[column].to_numpy() == expected[column].to_numpy()).all(), column
@@ -0,0 +1,54 @@
+import io
+
+import fsspec
+import pandas as pd
+
+from shards import ByteRange, plan_shards
+
+
+def _write_csv(path, rows):
+    lines = ["id,name\n"] + [f"{i},{'x' * (i % 17)}\n" for i in range(rows)]
+    path.write_text("".join(lines))
+    return "".join(lines).encode()
+
+
+def _read_range(path, shard):
+    with open(path, "rb") as f:
+        f.seek(shard["start"])
+        length = (shard["end"] if shard["end"] is not None else path.stat().st_size) - shard["start"]
+        return io.BufferedReader(ByteRange(f, length)).read()
+
+
+def test_byte_range_shards_are_newline_aligned_and_cover_every_row(tmp_path):
+    path = tmp_path / "input.csv"
+    data = _write_csv(path, 1000)
+    shards = plan_shards(fsspec.filesystem("file"), str(path), 7, min_shard_bytes=100)
+
+    assert len(shards) == 7
+    assert [s["index"] for s in shards] == list(range(7))
+    assert shards[0]["start"] == len(b"id,name\n")
+    assert shards[-1]["end"] is None
+    for shard in shards:
+        assert data[shard["start"] - 1:shard["start"]] == b"\n"  # every shard starts on a row
+    for shard, following in zip(shards, shards[1:]):
+        assert shard["end"] == following["start"]
+
+    body = b"".join(_read_range(path, s) for s in shards)
+    assert body == data[len(b"id,name\n"):]
+    ids = pd.read_csv(io.BytesIO(body), header=None)[0]
+    assert ids.tolist() == list(range(1000))
+
+
+def test_small_file_is_one_shard(tmp_path):
+    path = tmp_path / "input.csv"
+    _write_csv(path, 10)
+    shards = plan_shards(fsspec.filesystem("file"), str(path), 8)
+    assert shards == [{"index": 0, "source": str(path), "start": len(b"id,name\n"), "end": None}]
+
+
+def test_directory_is_one_shard_per_file(tmp_path):
+    for name in ("b.csv", "a.csv"):
+        _write_csv(tmp_path / name, 5)
+    shards = plan_shards(fsspec.filesystem("file"), str(tmp_path), 8)
+    assert [s["source"].rsplit("/", 1)[-1] for s in shards] == ["a.csv", "b.csv"]
+    assert all(s["start"] == 0 and s["end"] is None for s in shards)
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from validation import RuleValidator, TRANSACTION_RULES, evaluate_rules, failed_rule_names
+
+
+def _transactions(**overrides):
+    df = pd.DataFrame({
+        "txn_id": ["t1", "t2", "t3", "t4"],
+        "user_id": [1, 2, 3, 4],
+        "amount": [10.0, -5.0, 0.0, 7.5],
+        "currency": ["usd", "EUR", "XXX", None],
+        "txn_time": pd.to_datetime(["2025-09-01"] * 4, utc=True),
+    })
+    return df.assign(**overrides)
+
+
+def _bit(name):
+    return np.uint64(1) << np.uint64([r.name for r in TRANSACTION_RULES].index(name))
+
+
+def test_bitmask_sets_one_bit_per_failed_rule():
+    mask, counts = evaluate_rules(_transactions())
+    assert mask.dtype == np.uint64
+    assert mask[0] == 0
+    assert mask[1] == _bit("positive_amount")
+    assert mask[2] == _bit("positive_amount") | _bit("valid_currency")
+    assert mask[3] == _bit("not_null:currency")  # a null currency is left to not_null
+    assert counts["positive_amount"] == 2 and counts["valid_currency"] == 1 and counts["not_null:currency"] == 1
+
+
+def test_failed_rule_names_decode_the_mask():
+    mask, _ = evaluate_rules(_transactions())
+    assert failed_rule_names(mask).tolist() == ["", "positive_amount", "positive_amount,valid_currency",
+                                                "not_null:currency"]
+
+
+def test_rules_on_missing_columns_are_skipped():
+    mask, counts = evaluate_rules(_transactions().drop(columns=["currency"]))
+    assert "valid_currency" not in counts and "not_null:currency" not in counts
+    assert mask.tolist() == [0, _bit("positive_amount"), _bit("positive_amount"), 0]
+
+
+def test_validator_splits_and_grades_the_run():
+    validator = RuleValidator()
+    valid, quarantined = validator.split(_transactions())
+    assert valid["txn_id"].tolist() == ["t1"]
+    assert quarantined["failed_rules"].tolist() == ["positive_amount", "positive_amount,valid_currency",
+                                                    "not_null:currency"]
+    validator.split(_transactions(amount=1.0, currency="USD"))
+
+    assert (validator.rows_in, validator.rows_valid, validator.rows_quarantined) == (8, 5, 3)
+    assert validator.quarantine_rate == 3 / 8
+    assert validator.status(0.5) == "QUARANTINED"
+    assert validator.status(0.05) == "FAIL"
+    assert validator.status(None) == "QUARANTINED"
+
+
+def test_clean_run_passes():
+    validator = RuleValidator()
+    validator.split(_transactions(amount=1.0, currency="GBP"))
+    assert validator.status(0.0) == "PASS"
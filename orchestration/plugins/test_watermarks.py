@@ -0,0 +1,55 @@
+import pandas as pd
+
+from watermarks import WatermarkFilter, EventDayFilter
+
+
+def _chunk(*times):
+    return pd.DataFrame({"t": pd.to_datetime(list(times), utc=True), "v": range(len(times))})
+
+
+WATERMARK = {"max_event_time": pd.Timestamp("2025-09-01 12:00", tz="UTC"), "byte_offset": 100, "source": "s"}
+
+
+def test_no_watermark_keeps_everything_and_tracks_max():
+    newer = WatermarkFilter("t")
+    out = newer.apply(_chunk("2025-09-01 10:00", None, "2025-09-01 11:00"))
+    assert len(out) == 3
+    assert newer.skipped == 0
+    assert newer.next_watermark("s", 42) == {"max_event_time": pd.Timestamp("2025-09-01 11:00", tz="UTC"),
+                                             "byte_offset": 42, "source": "s"}
+
+
+def test_drops_rows_at_or_before_the_watermark_and_nat():
+    newer = WatermarkFilter("t", WATERMARK)
+    out = newer.apply(_chunk("2025-09-01 11:00", "2025-09-01 12:00", None, "2025-09-01 13:00"))
+    assert out["v"].tolist() == [3]
+    assert newer.skipped == 3
+    assert newer.max_seen == pd.Timestamp("2025-09-01 13:00", tz="UTC")
+
+
+def test_lateness_keeps_recent_late_rows():
+    newer = WatermarkFilter("t", WATERMARK, lateness=pd.Timedelta(hours=1))
+    out = newer.apply(_chunk("2025-09-01 10:30", "2025-09-01 11:30", "2025-09-01 12:00"))
+    assert out["v"].tolist() == [1, 2]
+    assert newer.skipped == 1
+
+
+def test_resumed_reader_filters_nothing_but_keeps_the_max():
+    newer = WatermarkFilter("t", WATERMARK, resumed=True)
+    out = newer.apply(_chunk("2025-09-01 09:00", "2025-09-01 12:00"))
+    assert len(out) == 2
+    assert newer.skipped == 0
+    assert newer.max_seen == WATERMARK["max_event_time"]  # late rows never move the watermark back
+
+
+def test_event_day_filter_keeps_one_utc_day():
+    on_day = EventDayFilter("t", "2025-09-01")
+    out = on_day.apply(_chunk("2025-08-31 23:59:59", "2025-09-01 00:00:00", "2025-09-01 23:59:59", None,
+                              "2025-09-02 00:00:00"))
+    assert out["v"].tolist() == [1, 2]
+    assert on_day.skipped == 3
+
+
+def test_event_day_filter_without_a_day_is_a_no_op():
+    chunk = _chunk("2025-08-31 23:00", None)
+    assert EventDayFilter("t").apply(chunk) is chunk
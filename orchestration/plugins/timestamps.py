@@ -0,0 +1,114 @@
+"""
+timestamps.py
+-------------
+Fast timestamp parsing for click_time / txn_time.
+
+pd.to_datetime without a format has to infer it, which is one of the slowest
+per-chunk steps. Instead the format is detected once per file from a sample
+of the first chunk (and cached per file/column), every chunk is parsed with
+that explicit format (or pandas' ISO8601 fast path), and only the rows that
+fail are re-parsed with the slow per-element path (format='mixed'). That
+fallback is logged as a warning, since per-element inference can read an
+ambiguous date like 03/04 either way; it resolves them with the explicit
+DAYFIRST setting. Rows that still end up NaT are counted so they can be
+reported as a metric.
+
+Functions:
+    detect_timestamp_format(values, cache_key, sample_size)
+    parse_timestamps(values, fmt)
+"""
+
+import logging
+
+import pandas as pd
+
+# Tried in order; the first with the best sample parse rate wins
+CANDIDATE_FORMATS = [
+    "ISO8601",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M:%S%z",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S%z",
+    "%Y-%m-%d %H:%M:%S.%f",
+    "%Y-%m-%dT%H:%M:%S.%fZ",
+    "%Y-%m-%d",
+    "%d/%m/%Y %H:%M:%S",
+    "%m/%d/%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M",
+    "%m/%d/%Y %H:%M",
+    "%d-%m-%Y %H:%M:%S",
+]
+SAMPLE_SIZE = 1_000
+# A format must parse at least this share of the sample to be used
+MIN_PARSE_RATE = 0.9
+# How the per-element fallback reads ambiguous dates such as 03/04/2025 (False: month first)
+DAYFIRST = False
+
+_FORMAT_CACHE = {}
+
+
+def _to_datetime(values: pd.Series, fmt: str = None) -> pd.Series:
+    return pd.to_datetime(values, format=fmt, utc=True, errors="coerce")
+
+
+def detect_timestamp_format(values: pd.Series, cache_key=None, sample_size: int = SAMPLE_SIZE) -> str:
+    """
+    Pick the candidate format that parses the most of a sample of values.
+
+    Args:
+        values (pd.Series): Raw timestamp strings (e.g. the first chunk's column)
+        cache_key (hashable, optional): e.g. (path, column); a cached format is reused
+        sample_size (int): Non-null values to test
+
+    Returns:
+        str: format string, 'ISO8601', or None when nothing parses well enough
+    """
+    if cache_key is not None and cache_key in _FORMAT_CACHE:
+        return _FORMAT_CACHE[cache_key]
+
+    sample = values.dropna().astype(str).head(sample_size)
+    best, best_rate = None, 0.0
+    if not sample.empty:
+        for fmt in CANDIDATE_FORMATS:
+            try:
+                rate = _to_datetime(sample, fmt).notna().mean()
+            except ValueError:  # e.g. 'ISO8601' on pandas < 2.0
+                continue
+            if rate > best_rate:
+                best, best_rate = fmt, rate
+            if rate == 1.0:
+                break
+
+    fmt = best if best_rate >= MIN_PARSE_RATE else None
+    logging.info(f"Detected timestamp format {fmt!r} for {cache_key or 'column'} ({best_rate:.1%} of sample)")
+    if cache_key is not None:
+        _FORMAT_CACHE[cache_key] = fmt
+    return fmt
+
+
+def _parse_fallback(values: pd.Series, reason: str) -> pd.Series:
+    """Slow path: infer the format per element, resolving ambiguous dates with DAYFIRST."""
+    logging.warning(f"Parsing {len(values)} timestamps per element ({reason}; format='mixed', dayfirst={DAYFIRST})")
+    try:
+        return pd.to_datetime(values, format="mixed", dayfirst=DAYFIRST, utc=True, errors="coerce")
+    except ValueError:  # pandas < 2.0 has no 'mixed' but already parses per element
+        return pd.to_datetime(values, dayfirst=DAYFIRST, utc=True, errors="coerce")
+
+
+def parse_timestamps(values: pd.Series, fmt: str = None) -> tuple:
+    """
+    Parse values to UTC timestamps with an explicit format, falling back only for failures.
+
+    Returns:
+        tuple: (parsed datetime64[UTC] Series, number of non-null values coerced to NaT)
+    """
+    if fmt is None:
+        parsed = _parse_fallback(values, "no format detected")
+    else:
+        parsed = _to_datetime(values, fmt)
+        failed = parsed.isna() & values.notna()
+        if failed.any():
+            parsed[failed] = _parse_fallback(values[failed], f"not matching {fmt!r}")
+
+    coerced = int((parsed.isna() & values.notna()).sum())
+    return parsed, coerced
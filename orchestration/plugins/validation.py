@@ -1,42 +1,196 @@
 """
 Validation module for ETL Week 2
-Includes:
-- Null checks
+Declarative, row-level rules for transactions:
+- Null checks on required columns
 - Positive amounts
 - Valid currency codes
+
+Rules are declared once in TRANSACTION_RULES. A rule whose columns are
+missing from the frame cannot be checked; it is skipped and logged as a
+warning (once per RuleValidator) rather than passing silently. `evaluate_rules` runs each
+rule's vectorized check over the chunk exactly once and ORs the results into
+a per-row failure bitmask (bit i = rule i), so no filtered copies are made.
+`RuleValidator.split` uses the bitmask to separate valid rows from rows to
+quarantine and keeps per-rule failure counts across chunks; `RuleValidator.status`
+grades a finished run PASS, QUARANTINED or FAIL against a maximum quarantine rate.
+
+Classes:
+    Rule(name, columns, check)
+    RuleValidator(rules)
+
+Functions:
+    inapplicable_rules(df, rules)
+    evaluate_rules(df, rules)
+    failed_rule_names(mask, rules)
+    validate_transactions(df)
 """
 
 import pandas as pd
+import numpy as np
 import logging
 
 VALID_CURRENCIES = ["USD", "EUR", "GBP", "INR", "JPY"]  # extend as needed
+REQUIRED_TRANSACTION_COLUMNS = ["txn_id", "user_id", "amount", "currency", "txn_time"]
 
-def validate_transactions(df: pd.DataFrame) -> pd.DataFrame:
-    """Validate transactions before loading"""
-    issues = []
-
-    # Null checks
-    null_cols = df.columns[df.isna().any()].tolist()
-    if null_cols:
-        issues.append(f"Null values in columns: {null_cols}")
-
-    # Positive amounts
-    if "amount" in df.columns:
-        neg = df[df["amount"] <= 0]
-        if not neg.empty:
-            issues.append(f"Negative or zero amounts: {len(neg)} rows")
-
-    # Valid currency codes
-    if "currency" in df.columns:
-        invalid_cur = df[~df["currency"].str.upper().isin(VALID_CURRENCIES)]
-        if not invalid_cur.empty:
-            issues.append(f"Invalid currencies: {invalid_cur['currency'].unique().tolist()}")
-
-    # Mark validation result
-    if issues:
-        logging.warning(f"Validation issues: {issues}")
-        df["validation_status"] = "failed"
+
+class Rule:
+    """
+    One validation rule.
+
+    Args:
+        name (str): Rule name used in failure counts and the quarantine's failed_rules column
+        columns (tuple): Columns the rule reads; the rule is skipped when any is absent
+        check (callable): df → boolean ndarray, True where a row violates the rule
+    """
+
+    def __init__(self, name: str, columns: tuple, check):
+        self.name = name
+        self.columns = tuple(columns)
+        self.check = check
+
+    def applies(self, df: pd.DataFrame) -> bool:
+        return all(c in df.columns for c in self.columns)
+
+
+def not_null(column: str) -> Rule:
+    return Rule(f"not_null:{column}", (column,), lambda df: df[column].isna().to_numpy())
+
+
+def _positive_amount(df: pd.DataFrame) -> np.ndarray:
+    return df["amount"].to_numpy(dtype="float64", na_value=np.nan) <= 0  # NaN is left to not_null:amount
+
+
+def _valid_currency(df: pd.DataFrame) -> np.ndarray:
+    # Check each distinct code once, then broadcast through the integer codes
+    currency = df["currency"]
+    if isinstance(currency.dtype, pd.CategoricalDtype):
+        codes, categories = currency.cat.codes.to_numpy(), currency.cat.categories
     else:
-        df["validation_status"] = "passed"
+        codes, categories = pd.factorize(currency)
+    valid = pd.Index(categories).astype(str).str.upper().isin(VALID_CURRENCIES)
+    lookup = np.append(~valid, False)  # code -1 (null currency) is left to not_null:currency
+    return lookup[codes]
+
+
+TRANSACTION_RULES = [
+    *(not_null(c) for c in REQUIRED_TRANSACTION_COLUMNS),
+    Rule("positive_amount", ("amount",), _positive_amount),
+    Rule("valid_currency", ("currency",), _valid_currency),
+]
+
+
+def inapplicable_rules(df: pd.DataFrame, rules=TRANSACTION_RULES) -> list:
+    """Names of the rules that read a column the frame does not have, with the missing columns."""
+    return [f"{r.name} (missing {[c for c in r.columns if c not in df.columns]})"
+            for r in rules if not r.applies(df)]
+
+
+def evaluate_rules(df: pd.DataFrame, rules=TRANSACTION_RULES) -> tuple:
+    """
+    Evaluate every applicable rule once over the frame.
+
+    Returns:
+        tuple: (uint64 failure bitmask per row, {rule name: failing row count})
+    """
+    if len(rules) > 64:
+        raise ValueError(f"At most 64 rules fit in the failure bitmask, got {len(rules)}")
+
+    mask = np.zeros(len(df), dtype=np.uint64)
+    counts = {}
+    for bit, rule in enumerate(rules):
+        if not rule.applies(df):
+            continue
+        failed = np.asarray(rule.check(df), dtype=bool)
+        counts[rule.name] = int(failed.sum())
+        np.bitwise_or(mask, np.uint64(1) << np.uint64(bit), out=mask, where=failed)
+    return mask, counts
+
+
+def failed_rule_names(mask: np.ndarray, rules=TRANSACTION_RULES) -> np.ndarray:
+    """Comma-joined names of the rules set in each bitmask value (decoded once per distinct value)."""
+    codes, uniques = pd.factorize(mask)
+    names = [",".join(r.name for bit, r in enumerate(rules) if int(m) >> bit & 1) for m in uniques]
+    return np.array(names, dtype=object)[codes]
+
+
+class RuleValidator:
+    """
+    Split chunks into valid and quarantined rows, accumulating per-rule failure counts.
+
+    Args:
+        rules (list): Rules to enforce (default TRANSACTION_RULES)
+    """
+
+    def __init__(self, rules=TRANSACTION_RULES):
+        self.rules = list(rules)
+        self.failures = {r.name: 0 for r in self.rules}
+        self.rows_in = 0
+        self.rows_valid = 0
+        self._warned_skipped = False
+
+    @property
+    def rows_quarantined(self) -> int:
+        return self.rows_in - self.rows_valid
+
+    @property
+    def quarantine_rate(self) -> float:
+        """Share of the rows that reached validation which were quarantined."""
+        return self.rows_quarantined / self.rows_in if self.rows_in else 0.0
+
+    def status(self, max_quarantine_rate: float = None) -> str:
+        """PASS if nothing was quarantined, QUARANTINED up to max_quarantine_rate (None: no limit), else FAIL."""
+        if self.rows_quarantined == 0:
+            return "PASS"
+        if max_quarantine_rate is None or self.quarantine_rate <= max_quarantine_rate:
+            return "QUARANTINED"
+        return "FAIL"
+
+    def split(self, df: pd.DataFrame) -> tuple:
+        """
+        Returns:
+            tuple: (valid rows, quarantined rows with a failed_rules column)
+        """
+        if not self._warned_skipped:
+            self._warned_skipped = True
+            skipped = inapplicable_rules(df, self.rules)
+            if skipped:
+                logging.warning(f"Validation rules skipped, columns missing: {skipped}")
+
+        mask, counts = evaluate_rules(df, self.rules)
+        for name, n in counts.items():
+            self.failures[name] += n
+
+        bad = mask != 0
+        self.rows_in += len(df)
+        if not bad.any():
+            self.rows_valid += len(df)
+            return df, df.iloc[:0]
+
+        valid, quarantined = df[~bad], df[bad].copy()
+        quarantined["failed_rules"] = failed_rule_names(mask[bad], self.rules)
+        self.rows_valid += len(valid)
+        return valid, quarantined
+
+    def summary(self) -> dict:
+        return {
+            "rows_in": self.rows_in,
+            "rows_valid": self.rows_valid,
+            "rows_quarantined": self.rows_quarantined,
+            "quarantine_rate": self.quarantine_rate,
+            "failures": {k: v for k, v in self.failures.items() if v},
+        }
+
+
+def validate_transactions(df: pd.DataFrame) -> pd.DataFrame:
+    """Validate transactions before loading, marking each row passed/failed"""
+    skipped = inapplicable_rules(df)
+    if skipped:
+        logging.warning(f"Validation rules skipped, columns missing: {skipped}")
+    mask, counts = evaluate_rules(df)
+    failures = {k: v for k, v in counts.items() if v}
+
+    if failures:
+        logging.warning(f"Validation issues (rows per rule): {failures}")
+    df["validation_status"] = np.where(mask != 0, "failed", "passed")
 
     return df
@@ -0,0 +1,191 @@
+"""
+writers.py
+----------
+Incremental chunk writers for processed outputs.
+
+Both writers accept DataFrame chunks one at a time, so the chunked ETL
+functions never hold the full dataset. Parquet output keeps column types
+(timestamps stay timestamps), dictionary-encodes low-cardinality string
+columns and compresses with zstd or snappy.
+
+A writer can target local paths and/or object-store URLs (gs://...) at the
+same time. Remote targets are opened as fsspec file handles, which upload in
+`part_size` blocks through a resumable/multipart upload while chunks are
+still being produced, so no local temp file is needed.
+
+Functions:
+    open_sink(target, part_size, fs)
+    open_writer(targets, output_format, dictionary_columns, compression, part_size, fs)
+"""
+
+import os
+
+import fsspec
+import pandas as pd
+
+OUTPUT_FORMATS = ("csv", "parquet")
+FILE_EXTENSIONS = {"csv": "csv", "parquet": "parquet"}
+
+
+def open_sink(target: str, part_size: int = None, fs=None):
+    """
+    Open a binary write handle for a local path or an fsspec URL.
+
+    Args:
+        target (str): Local path or URL such as gs://bucket/processed/...
+        part_size (int, optional): Upload block size in bytes for remote targets
+        fs (fsspec.AbstractFileSystem, optional): Filesystem to reuse for remote targets
+    """
+    if "://" not in target:
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        return open(target, "wb")
+
+    if fs is None:
+        fs, target = fsspec.core.url_to_fs(target)
+    kwargs = {"block_size": part_size} if part_size else {}
+    return fs.open(target, "wb", **kwargs)
+
+
+class TeeSink:
+    """Binary file-like object that forwards every write to several sinks."""
+
+    def __init__(self, sinks: list):
+        self.sinks = sinks
+        self.closed = False
+        self.bytes_written = 0
+
+    def write(self, data) -> int:
+        for sink in self.sinks:
+            sink.write(data)
+        self.bytes_written += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            sink.close()
+        self.closed = True
+
+    def discard(self) -> None:
+        """Abort uploads that support it (so no partial object is committed) and close the rest."""
+        for sink in self.sinks:
+            if hasattr(sink, "discard"):
+                sink.discard()
+            else:
+                sink.close()
+        self.closed = True
+
+
+class _ChunkWriter:
+    def __init__(self, targets, part_size: int = None, fs=None):
+        targets = [targets] if isinstance(targets, str) else list(targets)
+        self.path = targets[0]
+        self.targets = targets
+        self.chunks = 0
+        self.rows = 0
+        self.dtypes = None  # column → dtype of the first chunk written
+        self._sink = TeeSink([open_sink(t, part_size, fs) for t in targets])
+
+    @property
+    def bytes_written(self) -> int:
+        return self._sink.bytes_written
+
+    def _record(self, df: pd.DataFrame) -> None:
+        if self.dtypes is None:
+            self.dtypes = {c: str(t) for c, t in df.dtypes.items()}
+        self.chunks += 1
+        self.rows += len(df)
+
+    def close(self) -> None:
+        self._sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is not None:
+            self._sink.discard()
+        else:
+            self.close()
+
+
+class CsvChunkWriter(_ChunkWriter):
+    """Write chunks to a single CSV file, emitting the header once."""
+
+    def write(self, df: pd.DataFrame) -> None:
+        self._sink.write(df.to_csv(header=self.chunks == 0, index=False).encode("utf-8"))
+        self._record(df)
+
+
+class ParquetChunkWriter(_ChunkWriter):
+    """
+    Write chunks as row groups of a single Parquet file.
+
+    The Arrow schema is taken from the first chunk; later chunks are cast to it
+    so the file has one consistent typed schema.
+    """
+
+    def __init__(self, targets, dictionary_columns=None, compression: str = "zstd",
+                 part_size: int = None, fs=None):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet output requires pyarrow (pip install pyarrow)") from e
+
+        super().__init__(targets, part_size, fs)
+        self._pa, self._pq = pa, pq
+        self.dictionary_columns = list(dictionary_columns or [])
+        self.compression = compression
+        self.schema = None
+        self._writer = None
+
+    def write(self, df: pd.DataFrame) -> None:
+        pa = self._pa
+        if self.schema is None:
+            # Categorical columns get int32 dictionary indices so later chunks with more categories still fit
+            schema = pa.Schema.from_pandas(df, preserve_index=False)
+            for i, field in enumerate(schema):
+                if pa.types.is_dictionary(field.type):
+                    schema = schema.set(i, field.with_type(pa.dictionary(pa.int32(), field.type.value_type)))
+            self.schema = schema
+
+        table = pa.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+        if self._writer is None:
+            use_dictionary = [c for c in self.dictionary_columns if c in df.columns]
+            self._writer = self._pq.ParquetWriter(
+                self._sink,
+                self.schema,
+                compression=self.compression,
+                use_dictionary=use_dictionary or False,
+            )
+        self._writer.write_table(table)
+        self._record(df)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        super().close()
+
+
+def open_writer(targets, output_format: str = "csv", dictionary_columns=None,
+                compression: str = "zstd", part_size: int = None, fs=None):
+    """
+    Open a chunk writer for the given output format.
+
+    Args:
+        targets (str | list): Local path and/or gs:// URL(s) receiving the same bytes
+        output_format (str): 'csv' or 'parquet'
+        dictionary_columns (list, optional): Parquet columns to dictionary-encode
+        compression (str): Parquet codec, e.g. 'zstd' or 'snappy'
+        part_size (int, optional): Upload block size for remote targets
+        fs (fsspec.AbstractFileSystem, optional): Filesystem to reuse for remote targets
+    """
+    if output_format == "csv":
+        return CsvChunkWriter(targets, part_size, fs)
+    if output_format == "parquet":
+        return ParquetChunkWriter(targets, dictionary_columns, compression, part_size, fs)
+    raise ValueError(f"Unknown output format {output_format!r}; expected one of {OUTPUT_FORMATS}")